@@ -1,5 +1,5 @@
 import random
-from Testing.Tester import Tester
+from Testing.Tester import Tester, geometric_sizes
 
 from Programming.DataStructures.Point import Point
 """
@@ -354,4 +354,8 @@ if __name__ == '__main__':
 	tester.add_function("Fully Optimized Divide and Conquer",
 						fully_optimized_div_conq)
 
-	tester.test_all_functions()
\ No newline at end of file
+	tester.test_all_functions(shared_inputs=True)
+
+	tester.count_operations(
+		sized_generator=lambda size: (generate_point_lst(size),),
+		sizes=geometric_sizes(2 ** 2, 2 ** 7))
@@ -1,6 +1,19 @@
+import math
+import multiprocessing
+import os
 import random
+import tempfile
+import time
+from collections import deque
 
-from Programming.Testing import Tester
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from Programming.DataStructures.FenwickTree import FenwickTree
+from Programming.DataStructures.SortedMultiset import SortedMultiset
+from Programming.Testing.Tester import Tester
 
 """
 Problem: Counting the Number of Inversions in a List
@@ -85,6 +98,387 @@ def div_conq_inversion_counter(A):
         total_invs = left_invs + right_invs + last_invs
         return (final_sorted, total_invs)
 
+"""
+Fenwick Tree Solution (works with duplicates)
+
+div_conq_inversion_counter assumes distinct elements: when cur_A == cur_B,
+enhanced_merge takes both without counting the elements left in A that are
+bigger than cur_B. It also builds a sorted copy of A that we don't need.
+
+Instead, go through A from left to right and keep a count of how many times
+each value has been seen so far. The inversions A[j] is the second element of
+are the seen elements strictly bigger than A[j]:
+    (number seen so far) - (number seen so far that are <= A[j])
+The second term is a prefix sum over the counts, so keep the counts in a
+Fenwick tree to get both the prefix sum and the update in O(log n).
+
+The tree is indexed by value, so first replace every value with its rank
+among the distinct values of A (coordinate compression) - this keeps the
+tree at O(n) size no matter how big the values are.
+
+Cost: O(n log n) for sorting the distinct values + n * O(log n) for the tree
+"""
+def compress_coordinates(A):
+    """([int]) -> ([int], int)
+    Replaces every element of A by its rank (from 1) among the distinct
+    elements of A. Also returns the number of distinct elements.
+    """
+    ranks = {}
+    for rank, value in enumerate(sorted(set(A))):
+        ranks[value] = rank + 1
+    return ([ranks[value] for value in A], len(ranks))
+
+
+def fenwick_inversion_counter(A):
+    """([int] or array) -> int
+    Number of inversions in A (duplicates allowed), in O(n log n).
+    """
+    ranks, num_values = compress_coordinates(A)
+    seen_counts = FenwickTree(num_values)
+
+    inversions = 0
+    for num_seen, rank in enumerate(ranks):
+        inversions += num_seen - seen_counts.prefix_sum(rank)
+        seen_counts.add(rank)
+    return inversions
+
+
+# The counters that count_inversions can use
+INVERSION_COUNTERS = {
+    "naive": lambda A: naive_inversion_counter(A)[1],
+    "div_conq": lambda A: div_conq_inversion_counter(list(A))[1],
+    "fenwick": fenwick_inversion_counter
+}
+
+
+def count_inversions(A, engine="fenwick"):
+    """([int] or array, str) -> int
+    Number of inversions in A, counted by one of INVERSION_COUNTERS ("naive"
+    and "fenwick" handle duplicates, "div_conq" needs distinct elements).
+    """
+    return INVERSION_COUNTERS[engine](A)
+
+
+"""
+Streaming Solution
+
+The Fenwick tree solution only ever looks at the values seen so far, so it
+can keep going as new values arrive: appending x adds the number of stored
+values strictly bigger than x.
+
+Removing the oldest value x is the same idea backwards: x is the FIRST
+element of all of its remaining inversions, so it takes away the number of
+stored values strictly smaller than x. Dropping the oldest value every time
+a new one comes in keeps the count for a sliding window.
+
+The values can't be compressed in advance, so instead of a tree indexed by
+rank the stored values are kept in a SortedMultiset, which counts the values
+below or above x by binary search. Nothing has to be known about the values
+ahead of time, each step takes O(log n + LOAD), and memory is
+O(size of window).
+"""
+class StreamingInversionCounter:
+
+    def __init__(self, window=None):
+        """(int) -> StreamingInversionCounter
+
+        If window is given, only the last window values are kept.
+        """
+        self.window = window
+        self.values = deque()
+        self.inversions = 0
+        self._sorted = SortedMultiset()
+
+    def __len__(self):
+        return len(self.values)
+
+    def append(self, value):
+        """(int) -> int
+        Adds value to the end of the stream (dropping the oldest value if the
+        window is full) and returns the new number of inversions.
+        """
+        self.inversions += self._sorted.count_greater(value)
+        self._sorted.add(value)
+        self.values.append(value)
+
+        if (self.window is not None) and (len(self.values) > self.window):
+            self.pop_oldest()
+        return self.inversions
+
+    def pop_oldest(self):
+        """(None) -> int
+        Removes and returns the oldest value in the stream.
+        """
+        value = self.values.popleft()
+        self._sorted.remove(value)
+        self.inversions -= self._sorted.count_less(value)
+        return value
+
+
+"""
+Batch Kendall-Tau Distance
+
+The Kendall-tau distance between two rankings of the same n items is the
+number of pairs of items that they put in different orders. If every item of
+a ranking is replaced by its position in the reference ranking, that's
+exactly the number of inversions in the result.
+
+To do this for millions of rankings without a Python loop per ranking (or a
+Python object per element), run the Fenwick tree solution on ALL the rankings
+at once with NumPy: the rankings are the rows of a 2-D array, every row gets
+its own tree (a slice of one big array), and every step of the tree walks
+is done for all rows in one vectorised operation.
+
+Every row visits the same number of tree nodes per step (log n + 1) if
+  - queries that reach node 0 stay there (0 & -0 = 0, and node 0 is never
+    added to, so it contributes nothing)
+  - updates that run past the last real node are parked in a spare "sink"
+    column that is never read
+so there is no need to mask out finished rows.
+
+Every row's tree has (1 << bits of n) + 2 int32 nodes, so the rows are
+handled in chunks sized to keep the trees within KENDALL_TAU_CHUNK_BYTES
+(per process): long rankings get fewer rows per chunk, down to 1.
+"""
+KENDALL_TAU_CHUNK_ROWS = 2 ** 14
+KENDALL_TAU_CHUNK_BYTES = 2 ** 28
+
+
+def _batch_inversions(S):
+    """(2-D int array) -> 1-D int64 array
+    Inversions in every row of S, whose values are ranks in 1..S.shape[1].
+    """
+    num_rows, n = S.shape
+    num_nodes = 1 << n.bit_length()
+    sink = num_nodes + 1
+
+    # All the trees side by side in one flat array, row r's tree starting
+    # at row_starts[r] (flat indexing is much cheaper than 2-D indexing)
+    tree = np.zeros(num_rows * (num_nodes + 2), dtype=np.int32)
+    row_starts = np.arange(num_rows, dtype=np.int64) * (num_nodes + 2)
+    inversions = np.zeros(num_rows, dtype=np.int64)
+
+    for num_seen in range(n):
+        ranks = S[:, num_seen]
+
+        # Query: number seen so far that are <= the current rank
+        seen_below = np.zeros(num_rows, dtype=np.int64)
+        node = ranks.copy()
+        for i in range(n.bit_length() + 1):
+            seen_below += tree[row_starts + node]
+            node -= node & (-node)
+        inversions += num_seen - seen_below
+
+        # Update: count the current rank as seen
+        node = ranks.copy()
+        for i in range(n.bit_length() + 2):
+            tree[row_starts + node] += 1
+            node = np.minimum(node + (node & (-node)), sink)
+
+    return inversions
+
+
+def _kendall_tau_chunk_rows(n, chunk_rows, chunk_bytes):
+    """(int, int, int) -> int
+    Rows per chunk for rankings of n items: as many as fit the trees into
+    chunk_bytes, at most chunk_rows and at least 1.
+    """
+    tree_bytes = ((1 << n.bit_length()) + 2) * np.dtype(np.int32).itemsize
+    return max(1, min(chunk_rows, chunk_bytes // tree_bytes))
+
+
+def _batch_kendall_tau_chunk(task):
+    """((2-D int array, 1-D int array)) -> 1-D int64 array"""
+    rankings, reference_positions = task
+    return _batch_inversions(reference_positions[rankings])
+
+
+def batch_kendall_tau(rankings, reference, processes=None,
+                      chunk_rows=KENDALL_TAU_CHUNK_ROWS,
+                      chunk_bytes=KENDALL_TAU_CHUNK_BYTES):
+    """(2-D int array, 1-D int array, int, int, int) -> 1-D int64 array
+
+    Kendall-tau distance from reference to every row of rankings, where the
+    rows and reference are all orderings of the items 0..n-1. Rows are
+    handled in chunks of at most chunk_rows, with few enough rows that their
+    trees take at most chunk_bytes (always at least one row), and the chunks
+    are spread over that many processes if processes is given.
+    """
+    if np is None:
+        raise ImportError("batch_kendall_tau needs NumPy")
+
+    rankings = np.asarray(rankings, dtype=np.int64)
+    reference = np.asarray(reference, dtype=np.int64)
+    num_rows, n = rankings.shape
+    if reference.shape != (n,):
+        raise ValueError("reference must have the same length as the rows")
+
+    # Position (from 1) of every item in the reference ranking
+    reference_positions = np.empty(n, dtype=np.int64)
+    reference_positions[reference] = np.arange(1, n + 1)
+
+    chunk_rows = _kendall_tau_chunk_rows(n, chunk_rows, chunk_bytes)
+    tasks = [(rankings[start:start + chunk_rows], reference_positions)
+             for start in range(0, num_rows, chunk_rows)]
+    if tasks == []:
+        return np.zeros(0, dtype=np.int64)
+
+    if processes is None:
+        distances = [_batch_kendall_tau_chunk(task) for task in tasks]
+    else:
+        with multiprocessing.Pool(processes) as pool:
+            distances = pool.map(_batch_kendall_tau_chunk, tasks)
+    return np.concatenate(distances)
+
+
+def benchmark_batch_kendall_tau(num_rows, n, processes=None):
+    """(int, int, int) -> None
+    Compares batch_kendall_tau with calling fenwick_inversion_counter on
+    every row, in rankings per second.
+    """
+    rng = np.random.default_rng()
+    rankings = rng.permuted(np.tile(np.arange(n), (num_rows, 1)), axis=1)
+    reference = rng.permutation(n)
+
+    start = time.perf_counter()
+    batch_kendall_tau(rankings, reference, processes=processes)
+    batch_time = time.perf_counter() - start
+
+    reference_positions = np.empty(n, dtype=np.int64)
+    reference_positions[reference] = np.arange(n)
+    start = time.perf_counter()
+    for row in reference_positions[rankings].tolist():
+        fenwick_inversion_counter(row)
+    loop_time = time.perf_counter() - start
+
+    print("Kendall-Tau Benchmark ({rows} rankings of {n} items):".format(
+        rows=num_rows, n=n))
+    print("\tBatch: {rate:.0f} rankings/s".format(rate=num_rows / batch_time))
+    print("\tOne at a time: {rate:.0f} rankings/s".format(
+        rate=num_rows / loop_time))
+
+
+"""
+Range Inversion Queries (Mo's Algorithm)
+
+To answer "how many inversions are in A[l:r]?" for many (l, r) over the same
+A, keep one window A[cur_l:cur_r] with its inversion count and a Fenwick tree
+of the (compressed) values in it, and move the window from query to query:
+    add A[cur_r] on the right:   + (number in window bigger than it)
+    add A[cur_l - 1] on the left: + (number in window smaller than it)
+    removing is the same thing backwards
+Every move is O(log n), so the cost depends on how far the window travels.
+
+Mo's trick: if the queries are known in advance (offline), answer them in an
+order that keeps that distance small - group them into blocks of size about
+n / sqrt(q) by l, and sort each block by r (alternating up and down between
+blocks so r doesn't jump back at every block). Then cur_l moves O(n / sqrt(q))
+per query and cur_r moves O(n) per block, for a total of
+    O((n * sqrt(q) + q) * log n)
+instead of O(q * n log n) for slicing and recounting every query.
+
+query() answers one query at a time (online) by moving the same window from
+wherever the last query left it, which is cheap when consecutive queries are
+close together.
+"""
+class RangeInversionQueries:
+
+    def __init__(self, A):
+        """([int] or array) -> RangeInversionQueries"""
+        self.ranks, num_values = compress_coordinates(A)
+        self._counts = FenwickTree(num_values)
+        self._cur_l = 0
+        self._cur_r = 0
+        self._inversions = 0
+
+    def _move_to(self, l, r):
+        """(int, int) -> int
+        Moves the window to A[l:r] and returns its number of inversions.
+        """
+        if not (0 <= l <= r <= len(self.ranks)):
+            raise ValueError("({l}, {r}) is not a range of A".format(l=l, r=r))
+        ranks, counts = self.ranks, self._counts
+
+        # Grow before shrinking, so the window never has a negative size
+        while self._cur_r < r:
+            rank = ranks[self._cur_r]
+            self._inversions += ((self._cur_r - self._cur_l) -
+                                 counts.prefix_sum(rank))
+            counts.add(rank)
+            self._cur_r += 1
+        while self._cur_l > l:
+            self._cur_l -= 1
+            rank = ranks[self._cur_l]
+            self._inversions += counts.prefix_sum(rank - 1)
+            counts.add(rank)
+        while self._cur_r > r:
+            self._cur_r -= 1
+            rank = ranks[self._cur_r]
+            counts.add(rank, -1)
+            self._inversions -= ((self._cur_r - self._cur_l) -
+                                 counts.prefix_sum(rank))
+        while self._cur_l < l:
+            rank = ranks[self._cur_l]
+            counts.add(rank, -1)
+            self._inversions -= counts.prefix_sum(rank - 1)
+            self._cur_l += 1
+
+        return self._inversions
+
+    def query(self, l, r):
+        """(int, int) -> int
+        Number of inversions in A[l:r].
+        """
+        return self._move_to(l, r)
+
+    def answer(self, queries):
+        """([(int, int)]) -> [int]
+        Number of inversions in A[l:r] for every (l, r) in queries, answered
+        in Mo's order.
+        """
+        if queries == []:
+            return []
+        block_size = max(1, int(len(self.ranks) / math.sqrt(len(queries))))
+
+        def mo_order(i):
+            l, r = queries[i]
+            block = l // block_size
+            return (block, r if block % 2 == 0 else -r)
+
+        answers = [0] * len(queries)
+        for i in sorted(range(len(queries)), key=mo_order):
+            answers[i] = self._move_to(*queries[i])
+        return answers
+
+
+def benchmark_range_inversion_queries(n, num_queries):
+    """(int, int) -> None
+    Compares RangeInversionQueries.answer with slicing and recounting every
+    query (fenwick_inversion_counter), in queries per second.
+    """
+    A = [random.randint(0, n) for i in range(n)]
+    queries = []
+    for i in range(num_queries):
+        l, r = sorted([random.randint(0, n), random.randint(0, n)])
+        queries += [(l, r)]
+
+    start = time.perf_counter()
+    RangeInversionQueries(A).answer(queries)
+    mo_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for l, r in queries:
+        fenwick_inversion_counter(A[l:r])
+    slicing_time = time.perf_counter() - start
+
+    print("Range Inversion Query Benchmark ({q} queries, n = {n}):".format(
+        q=num_queries, n=n))
+    print("\tMo's Algorithm: {rate:.0f} queries/s".format(
+        rate=num_queries / mo_time))
+    print("\tSlicing and Recounting: {rate:.0f} queries/s".format(
+        rate=num_queries / slicing_time))
+
+
 def generate_randomly_sized_lst():
     temp_set = set()
     for i in range(30):
@@ -94,8 +488,122 @@ def generate_randomly_sized_lst():
     return (list(temp_set),)
 
 
+def generate_lst_with_duplicates():
+    return ([random.randint(0, 10) for i in range(random.randint(0, 40))],)
+
+
+def naive_window_inversions(values, window):
+    """([int], int) -> [int]
+    Inversions in the last window values (all values if window is None)
+    after every value, recounted from scratch each time.
+    """
+    counts = []
+    for i in range(len(values)):
+        start = 0 if window is None else max(0, i + 1 - window)
+        counts += [naive_inversion_counter(values[start:i + 1])[1]]
+    return counts
+
+
+def streaming_window_inversions(values, window):
+    """([int], int) -> [int]
+    Same as naive_window_inversions, using a StreamingInversionCounter.
+    """
+    counter = StreamingInversionCounter(window)
+    return [counter.append(value) for value in values]
+
+
+def generate_stream_with_window():
+    window = random.choice([None, random.randint(1, 10)])
+    return (generate_lst_with_duplicates()[0], window)
+
+
+def naive_kendall_tau(rankings, reference):
+    """([[int]], [int]) -> [int]"""
+    positions = {}
+    for position, item in enumerate(reference):
+        positions[item] = position
+    return [naive_inversion_counter([positions[item] for item in ranking])[1]
+            for ranking in rankings]
+
+
+def generate_rankings():
+    n = random.randint(1, 20)
+    reference = random.sample(range(n), n)
+    rankings = [random.sample(range(n), n)
+                for i in range(random.randint(1, 30))]
+    return (rankings, reference)
+
+
+def naive_range_inversions(A, queries):
+    """([int], [(int, int)]) -> [int]"""
+    return [naive_inversion_counter(A[l:r])[1] for l, r in queries]
+
+
+def generate_range_queries():
+    A = generate_lst_with_duplicates()[0]
+    queries = []
+    for i in range(random.randint(0, 30)):
+        l, r = sorted([random.randint(0, len(A)), random.randint(0, len(A))])
+        queries += [(l, r)]
+    return (A, queries)
+
+
 if __name__ == '__main__':
     tester = Tester("Inversion Counting Tester", naive_inversion_counter,
                     generate_randomly_sized_lst, 5000)
     tester.add_function("Divide and Conquer Inversion Counter", div_conq_inversion_counter)
-    tester.test_all_functions()
\ No newline at end of file
+    tester.test_all_functions(processes=multiprocessing.cpu_count())
+
+    # The parallel inputs are seeded, so from the second run on the naive
+    # counts come from the cache (until something in this file changes)
+    duplicates_tester = Tester("Inversion Counting With Duplicates Tester",
+                               lambda A: naive_inversion_counter(A)[1],
+                               generate_lst_with_duplicates, 5000,
+                               cache_dir=os.path.join(tempfile.gettempdir(),
+                                                      "inversion_cache"))
+    duplicates_tester.add_function("Fenwick Tree Inversion Counter",
+                                   fenwick_inversion_counter)
+    duplicates_tester.test_all_functions(
+        processes=multiprocessing.cpu_count())
+
+    streaming_tester = Tester("Streaming Inversion Counting Tester",
+                              naive_window_inversions,
+                              generate_stream_with_window, 1000)
+    streaming_tester.add_function("Streaming Inversion Counter",
+                                  streaming_window_inversions)
+    streaming_tester.test_all_functions(processes=multiprocessing.cpu_count())
+
+    range_tester = Tester("Range Inversion Query Tester",
+                          naive_range_inversions,
+                          generate_range_queries, 1000)
+    range_tester.add_function(
+        "Mo's Algorithm (offline)",
+        lambda A, queries: RangeInversionQueries(A).answer(queries))
+
+    def online_range_inversions(A, queries):
+        engine = RangeInversionQueries(A)
+        return [engine.query(l, r) for l, r in queries]
+    range_tester.add_function("Moving Window (online)", online_range_inversions)
+    range_tester.test_all_functions(processes=multiprocessing.cpu_count())
+
+    benchmark_range_inversion_queries(n=20000, num_queries=1000)
+
+    if np is not None:
+        kendall_tau_tester = Tester(
+            "Batch Kendall-Tau Tester",
+            naive_kendall_tau,
+            generate_rankings, 200,
+            equivalence_fxn=lambda x, y: x == list(y))
+        kendall_tau_tester.add_function("Batch Kendall-Tau", batch_kendall_tau)
+        kendall_tau_tester.add_function(
+            "Batch Kendall-Tau (small chunks, 2 processes)",
+            lambda rankings, reference: batch_kendall_tau(
+                rankings, reference, processes=2, chunk_rows=7))
+        kendall_tau_tester.add_function(
+            "Batch Kendall-Tau (byte budget of one tree)",
+            lambda rankings, reference: batch_kendall_tau(
+                rankings, reference, chunk_bytes=1))
+        kendall_tau_tester.test_all_functions()
+
+        benchmark_batch_kendall_tau(num_rows=100000, n=50,
+                                    processes=multiprocessing.cpu_count())
@@ -1,6 +1,14 @@
+import heapq
+import multiprocessing
+import os
 import random # for testing
+import tempfile
+import time
+from array import array
+from multiprocessing.shared_memory import SharedMemory
 
-from Programming.Testing import Tester
+from Programming.Quizzes.MasterTheoremQuiz import Recurrence
+from Programming.Testing.Tester import Tester, geometric_sizes
 
 """
 Merge Sort - Divide and Conquer Example 1
@@ -134,6 +142,110 @@ def recursive_merge(A, B):
 		elif A[0] > B[0]:
 			return [B[0]] + recursive_merge(A, B[1:])
 
+"""
+Lazy Merging
+
+iterative_merge needs both lists in memory and builds a whole new list. The
+same loop works on any two sorted iterables if it only ever looks at the
+current front element of each, and hands every element out (yields it) as
+soon as it's picked instead of appending it to ret_lst.
+
+To merge k sorted streams, merge them in a balanced tree of these lazy
+two-way merges (first half of the streams vs. second half, recursively).
+Every element passes through about log k merges, so merging n elements
+costs O(n log k) comparisons, and only one element per stream is held in
+memory at a time.
+
+Ties always go to the left input (like the A-first rule of iterative_merge),
+and the left subtree holds the earlier streams, so equal elements come out
+in the order of the streams they came from.
+"""
+def lazy_merge(A, B, key=None):
+	"""(iterable, iterable, ((Unknown) -> Unknown)) -> generator
+
+	Lazily merges two sorted iterables (sorted by key if it's given). Ties go
+	to A.
+	"""
+	if key is None:
+		key = lambda x: x
+	done = object()
+
+	A_iter, B_iter = iter(A), iter(B)
+	cur_A, cur_B = next(A_iter, done), next(B_iter, done)
+	if cur_A is not done:
+		key_A = key(cur_A)
+	if cur_B is not done:
+		key_B = key(cur_B)
+
+	while (cur_A is not done) and (cur_B is not done):
+		# B has the smaller element
+		if key_B < key_A:
+			yield cur_B
+			cur_B = next(B_iter, done)
+			if cur_B is not done:
+				key_B = key(cur_B)
+
+		# A has the smaller element (or they're the same)
+		else:
+			yield cur_A
+			cur_A = next(A_iter, done)
+			if cur_A is not done:
+				key_A = key(cur_A)
+
+	# At most one of these has leftovers
+	if cur_A is not done:
+		yield cur_A
+		yield from A_iter
+	if cur_B is not done:
+		yield cur_B
+		yield from B_iter
+
+def lazy_k_way_merge(*iterables, key=None):
+	"""(iterable, ..., ((Unknown) -> Unknown)) -> iterator
+
+	Lazily merges any number of sorted iterables (sorted by key if it's
+	given). Equal elements come out in the order of their iterables.
+	"""
+	if len(iterables) == 0:
+		return iter([])
+	elif len(iterables) == 1:
+		return iter(iterables[0])
+	else:
+		mid = len(iterables) // 2
+		return lazy_merge(lazy_k_way_merge(*iterables[:mid], key=key),
+						  lazy_k_way_merge(*iterables[mid:], key=key),
+						  key=key)
+
+def benchmark_k_way_merge(num_streams, stream_len):
+	"""(int, int) -> None
+
+	Compares the throughput (merged elements per second) of lazy_k_way_merge
+	against merging the streams one at a time with iterative_merge, and
+	against heapq.merge.
+	"""
+	streams = [sorted(generate_random_arr(stream_len))
+			   for i in range(num_streams)]
+	total = num_streams * stream_len
+
+	def repeated_iterative_merge():
+		ret_lst = []
+		for stream in streams:
+			ret_lst = iterative_merge(ret_lst, stream)
+		return ret_lst
+
+	merges = [("Lazy k-way Merge", lambda: list(lazy_k_way_merge(*streams))),
+			  ("Repeated Iterative Merge", repeated_iterative_merge),
+			  ("heapq.merge", lambda: list(heapq.merge(*streams)))]
+
+	print("k-way Merge Benchmark ({k} streams of {n}):".format(k=num_streams,
+															  n=stream_len))
+	for merge_name, merge in merges:
+		start = time.perf_counter()
+		merge()
+		elapsed = time.perf_counter() - start
+		print("\t{name}: {rate:.0f} elements/s".format(name=merge_name,
+													   rate=total / elapsed))
+
 def merge_sort_using_iter(A):
 	if len(A) < 2:
 		return A
@@ -160,6 +272,252 @@ def merge_sort_using_rec(A):
 
 		return recursive_merge(sorted_L, sorted_R)
 
+"""
+Bottom-Up Merge Sort
+
+merge_sort_using_iter allocates new lists at every level of the recursion
+(the A[:mid] and A[mid:] slices, the ret_lst += [x] appends and the leftover
+concatenation in iterative_merge), which is O(n log n) allocation in total.
+
+The same merges can be done without recursion, ping-ponging between two
+buffers of size n that are allocated once:
+	1) Insertion sort every run of cutoff elements in place (merging tiny runs
+	   costs more than insertion sorting them)
+	2) Merge neighbouring runs of width w from the source buffer into the
+	   destination buffer
+	3) Swap the roles of the buffers, double w and repeat until w >= n
+
+Every merge takes from the left run when the elements are equal, so (like
+iterative_merge) the sort is stable.
+"""
+INSERTION_SORT_CUTOFF = 32
+
+def insertion_sort_run(A, lo, hi):
+	"""([int], int, int) -> None
+	Stable insertion sort of A[lo:hi], in place.
+	"""
+	for i in range(lo + 1, hi):
+		cur = A[i]
+		j = i - 1
+		while (j >= lo) and (A[j] > cur):
+			A[j + 1] = A[j]
+			j -= 1
+		A[j + 1] = cur
+
+def merge_runs(src, dst, lo, mid, hi):
+	"""([int], [int], int, int, int) -> None
+	Stable merge of the sorted runs src[lo:mid] and src[mid:hi] into
+	dst[lo:hi].
+	"""
+	# The runs are already in order, nothing to merge
+	if (mid == hi) or (src[mid - 1] <= src[mid]):
+		dst[lo:hi] = src[lo:hi]
+		return
+
+	i, j, k = lo, mid, lo
+	while (i < mid) and (j < hi):
+		if src[j] < src[i]:
+			dst[k] = src[j]
+			j += 1
+		else:
+			dst[k] = src[i]
+			i += 1
+		k += 1
+
+	# Only one of these is non-empty
+	dst[k:k + (mid - i)] = src[i:mid]
+	dst[k + (mid - i):hi] = src[j:hi]
+
+def bottom_up_merge_sort(A, key=None, cutoff=INSERTION_SORT_CUTOFF):
+	"""([int] or array, ((Unknown) -> Unknown), int) -> [int] or array
+
+	Stable, in-place bottom-up merge sort of a list or array.array. Runs of
+	cutoff elements are insertion sorted first. If key is given, the elements
+	are ordered by key(element) (computed once per element). Returns A.
+	"""
+	if key is not None:
+		# Sort (key, position) pairs instead - the positions break ties, which
+		# keeps the sort stable
+		decorated = [(key(x), i) for i, x in enumerate(A)]
+		bottom_up_merge_sort(decorated, cutoff=cutoff)
+		originals = A[:]
+		for k, (x_key, i) in enumerate(decorated):
+			A[k] = originals[i]
+		return A
+
+	n = len(A)
+	cutoff = max(cutoff, 1)
+	for lo in range(0, n, cutoff):
+		insertion_sort_run(A, lo, min(lo + cutoff, n))
+
+	src, dst = A, A[:]
+	width = cutoff
+	while width < n:
+		for lo in range(0, n, 2 * width):
+			merge_runs(src, dst, lo, min(lo + width, n), min(lo + 2 * width, n))
+		src, dst = dst, src
+		width *= 2
+
+	# The last pass may have ended in the spare buffer
+	if src is not A:
+		A[:] = src
+	return A
+
+"""
+External Merge Sort
+
+For files of fixed-size integer records that are too big to sort in memory:
+	1) Read memory_budget bytes worth of records at a time, sort them with
+	   bottom_up_merge_sort and write each sorted chunk to its own run file
+	2) Merge the runs: keep the smallest unmerged record of every run in a
+	   heap, repeatedly write out the smallest one and replace it with the
+	   next record of the same run
+
+A merge has a file open (and a block in memory) for every run, so it takes
+at most max_fan_in runs at a time. With more runs than that, merge passes
+turn every max_fan_in consecutive runs into one longer run file, until one
+final merge is left: about log_(max_fan_in)(number of runs) passes over the
+data.
+
+Neither step holds more than memory_budget bytes of records: the runs are read
+(and the output written) through fixed-size blocks that split the budget.
+
+Ties in the heap go to the run that came first in the input, which is the
+same rule iterative_merge uses (take from A first), and the passes only merge
+consecutive runs, so the sort is stable.
+"""
+EXTERNAL_SORT_MEMORY_BUDGET = 64 * (2 ** 20)
+EXTERNAL_SORT_MAX_FAN_IN = 128
+
+def external_merge_sort(in_path, out_path,
+						memory_budget=EXTERNAL_SORT_MEMORY_BUDGET,
+						typecode="q", tmp_dir=None,
+						max_fan_in=EXTERNAL_SORT_MAX_FAN_IN):
+	"""(str, str, int, str, str, int) -> None
+
+	Sorts the binary file of array typecode records at in_path into out_path,
+	using about memory_budget bytes of memory and merging at most max_fan_in
+	run files at once. Run files are created in tmp_dir (the system default
+	if None) and removed afterwards.
+	"""
+	if max_fan_in < 2:
+		raise ValueError("max_fan_in must be at least 2, got {k}".format(
+			k=max_fan_in))
+	item_size = array(typecode).itemsize
+	if os.path.getsize(in_path) % item_size != 0:
+		raise ValueError("{path} is not a whole number of {size}-byte "
+						 "records".format(path=in_path, size=item_size))
+
+	# Sorting a chunk needs a spare buffer of the same size
+	chunk_len = max(memory_budget // (2 * item_size), 1)
+
+	run_paths = []
+	# Every temporary file that still exists, for the cleanup
+	temp_paths = set()
+	try:
+		with open(in_path, "rb") as in_file:
+			while True:
+				chunk = read_block(in_file, typecode, chunk_len)
+				if len(chunk) == 0:
+					break
+				bottom_up_merge_sort(chunk)
+
+				handle, run_path = tempfile.mkstemp(suffix=".run", dir=tmp_dir)
+				run_paths += [run_path]
+				temp_paths.add(run_path)
+				with os.fdopen(handle, "wb") as run_file:
+					chunk.tofile(run_file)
+
+		while len(run_paths) > max_fan_in:
+			merged_paths = []
+			for g in range(0, len(run_paths), max_fan_in):
+				group = run_paths[g:g + max_fan_in]
+				handle, merged_path = tempfile.mkstemp(suffix=".run", dir=tmp_dir)
+				os.close(handle)
+				merged_paths += [merged_path]
+				temp_paths.add(merged_path)
+				k_way_merge_runs(group, merged_path, typecode,
+								 merge_block_len(memory_budget, item_size,
+												 len(group)))
+			for run_path in run_paths:
+				os.remove(run_path)
+				temp_paths.discard(run_path)
+			run_paths = merged_paths
+
+		k_way_merge_runs(run_paths, out_path, typecode,
+						 merge_block_len(memory_budget, item_size,
+										 len(run_paths)))
+
+	finally:
+		for temp_path in temp_paths:
+			os.remove(temp_path)
+
+def merge_block_len(memory_budget, item_size, num_runs):
+	"""(int, int, int) -> int
+	Records per block when the budget is split between a block per run plus
+	the output block.
+	"""
+	return max((memory_budget // item_size) // (num_runs + 1), 1)
+
+def read_block(in_file, typecode, block_len):
+	"""(file, str, int) -> array
+	Reads up to block_len records from in_file (fewer at the end of the file).
+	"""
+	block = array(typecode)
+	try:
+		block.fromfile(in_file, block_len)
+	except EOFError:
+		# Whatever records were left have still been read into block
+		pass
+	return block
+
+def read_run(run_file, typecode, block_len):
+	"""(file, str, int) -> generator of int
+	Lazily yields the records of run_file, reading block_len at a time.
+	"""
+	while True:
+		block = read_block(run_file, typecode, block_len)
+		if len(block) == 0:
+			return
+		yield from block
+
+def k_way_merge_runs(run_paths, out_path, typecode, block_len):
+	"""([str], str, str, int) -> None
+	Stable heap-based merge of the sorted run files into out_path.
+	"""
+	run_files = [open(run_path, "rb") for run_path in run_paths]
+	try:
+		runs = [read_run(run_file, typecode, block_len)
+				for run_file in run_files]
+
+		# Heap entries are (record, run number), so ties go to earlier runs
+		heap = []
+		for run_num, run in enumerate(runs):
+			first = next(run, None)
+			if first is not None:
+				heap += [(first, run_num)]
+		heapq.heapify(heap)
+
+		with open(out_path, "wb") as out_file:
+			out_block = array(typecode)
+			while heap != []:
+				smallest, run_num = heap[0]
+				out_block.append(smallest)
+
+				following = next(runs[run_num], None)
+				if following is None:
+					heapq.heappop(heap)
+				else:
+					heapq.heapreplace(heap, (following, run_num))
+
+				if len(out_block) >= block_len:
+					out_block.tofile(out_file)
+					out_block = array(typecode)
+			out_block.tofile(out_file)
+	finally:
+		for run_file in run_files:
+			run_file.close()
+
 def generate_random_arr(size):
 	"""
 	Generates an array of length size, with each element randomly ranging
@@ -175,6 +533,238 @@ def generate_random_arr(size):
 def generate_random_tupified_arr():
 	return (generate_random_arr(random.randint(0, 40)),)
 
+def generate_bottom_up_sort_input():
+	"""
+	Random lists or array.arrays (up to 300 elements, so there are several
+	merge passes) along with a random cutoff.
+	"""
+	arr = generate_random_arr(random.randint(0, 300))
+	if random.randint(0, 1):
+		arr = array("l", arr)
+	return (arr, random.randint(1, 40))
+
+"""
+Parallel Merge Sort
+
+The two recursive calls of merge sort are independent, so the top levels of
+the recursion can run at the same time on different cores:
+	1) Split A into one chunk per worker process, and have every worker sort
+	   its chunk with bottom_up_merge_sort
+	2) Merge neighbouring runs in rounds until one run is left (like the
+	   passes of bottom_up_merge_sort). A round only has half as many merges
+	   as the last one, so every merge is itself split between the workers:
+
+Merge Path / Co-Ranking:
+	The first k elements of merge(A, B) are the first i elements of A and the
+	first (k - i) elements of B for exactly one i, the "co-rank" of k. Since
+	it can be found with a binary search, a merge of length n can be cut at
+	any outputs k_0 < k_1 < ... and every piece [k_p, k_(p + 1)) merged
+	independently, without looking at any of the other pieces.
+
+The data lives in two multiprocessing.shared_memory buffers (the merges
+ping-pong between them), so workers never pickle any elements back and forth.
+"""
+def co_rank(k, X, a_lo, a_len, b_lo, b_len):
+	"""(int, [int], int, int, int, int) -> int
+
+	Number of elements of A = X[a_lo:a_lo + a_len] among the first k elements
+	of the stable merge of A with B = X[b_lo:b_lo + b_len] (ties go to A).
+	"""
+	# Find the smallest i such that the last element taken from B is smaller
+	# than the first one left in A (this gets bigger as i grows)
+	lo = max(0, k - b_len)
+	hi = min(k, a_len)
+	while lo < hi:
+		i = (lo + hi) // 2
+		j = k - i
+		if (j == 0) or (X[b_lo + j - 1] < X[a_lo + i]):
+			hi = i
+		else:
+			lo = i + 1
+	return lo
+
+def _sort_shared_chunk(task):
+	"""((str, str, int, int)) -> None
+	Worker: sorts [lo, hi) of the named shared buffer in place.
+	"""
+	name, typecode, lo, hi = task
+	shared = SharedMemory(name=name)
+	view = shared.buf.cast(typecode)
+	try:
+		chunk = array(typecode)
+		chunk.frombytes(view[lo:hi].cast("B"))
+		view[lo:hi] = bottom_up_merge_sort(chunk)
+	finally:
+		view.release()
+		shared.close()
+
+def _merge_shared_piece(task):
+	"""((str, str, str, int, int, int, int, int)) -> None
+	Worker: writes outputs [out_lo, out_hi) of the merge of src[lo:mid] and
+	src[mid:hi] to the same positions of dst.
+	"""
+	src_name, dst_name, typecode, lo, mid, hi, out_lo, out_hi = task
+	src_shared = SharedMemory(name=src_name)
+	dst_shared = SharedMemory(name=dst_name)
+	src = src_shared.buf.cast(typecode)
+	dst = dst_shared.buf.cast(typecode)
+	try:
+		a_len, b_len = mid - lo, hi - mid
+		i_start = co_rank(out_lo - lo, src, lo, a_len, mid, b_len)
+		i_stop = co_rank(out_hi - lo, src, lo, a_len, mid, b_len)
+		j_start = (out_lo - lo) - i_start
+		j_stop = (out_hi - lo) - i_stop
+
+		# Copy the two pieces next to each other, and merge them with merge_runs
+		pieces = array(typecode)
+		pieces.frombytes(src[lo + i_start:lo + i_stop].cast("B"))
+		pieces.frombytes(src[mid + j_start:mid + j_stop].cast("B"))
+		merged = pieces[:]
+		merge_runs(pieces, merged, 0, i_stop - i_start, len(pieces))
+		dst[out_lo:out_hi] = merged
+	finally:
+		src.release()
+		dst.release()
+		src_shared.close()
+		dst_shared.close()
+
+def parallel_merge_sort(A, processes=None, typecode="q"):
+	"""([int] or array, int, str) -> [int] or array
+
+	Stable, in-place merge sort of A spread over a pool of processes (one per
+	core by default). The elements must fit in array typecode. Returns A.
+	"""
+	n = len(A)
+	if processes is None:
+		processes = os.cpu_count()
+	if n < 2:
+		return A
+
+	item_size = array(typecode).itemsize
+	src_shared = SharedMemory(create=True, size=n * item_size)
+	dst_shared = SharedMemory(create=True, size=n * item_size)
+	try:
+		src_view = src_shared.buf.cast(typecode)
+		src_view[:] = array(typecode, A)
+		src_view.release()
+
+		with multiprocessing.Pool(processes) as pool:
+			# 1) Sort one chunk per process
+			bounds = [(n * p) // processes for p in range(processes + 1)]
+			runs = [(bounds[p], bounds[p + 1]) for p in range(processes)
+					if bounds[p] < bounds[p + 1]]
+			pool.map(_sort_shared_chunk,
+					 [(src_shared.name, typecode, lo, hi) for lo, hi in runs])
+
+			# 2) Merge neighbouring runs, with every merge cut into about
+			# (processes * its share of n) pieces
+			while len(runs) > 1:
+				tasks = []
+				new_runs = []
+				for r in range(0, len(runs), 2):
+					lo, mid = runs[r]
+					hi = runs[r + 1][1] if r + 1 < len(runs) else mid
+					num_pieces = max(1, (processes * (hi - lo)) // n)
+					for p in range(num_pieces):
+						out_lo = lo + ((hi - lo) * p) // num_pieces
+						out_hi = lo + ((hi - lo) * (p + 1)) // num_pieces
+						tasks += [(src_shared.name, dst_shared.name, typecode,
+								   lo, mid, hi, out_lo, out_hi)]
+					new_runs += [(lo, hi)]
+				pool.map(_merge_shared_piece, tasks)
+				src_shared, dst_shared = dst_shared, src_shared
+				runs = new_runs
+
+		src_view = src_shared.buf.cast(typecode)
+		if isinstance(A, array):
+			A[:] = array(A.typecode, src_view)
+		else:
+			A[:] = src_view.tolist()
+		src_view.release()
+		return A
+	finally:
+		for shared in (src_shared, dst_shared):
+			shared.close()
+			shared.unlink()
+
+def benchmark_parallel_merge_sort(sizes, processes=None):
+	"""([int], int) -> int or None
+
+	Times bottom_up_merge_sort against parallel_merge_sort on random arrays of
+	each size, and returns the smallest size where the parallel sort was
+	faster (None if it never was).
+	"""
+	if processes is None:
+		processes = os.cpu_count()
+	print("Parallel MergeSort Benchmark ({num} processes):".format(
+		num=processes))
+
+	crossover = None
+	for size in sizes:
+		arr = array("q", (random.randint(0, 2 ** 40) for i in range(size)))
+
+		start = time.perf_counter()
+		bottom_up_merge_sort(arr[:])
+		single_time = time.perf_counter() - start
+
+		start = time.perf_counter()
+		parallel_merge_sort(arr[:], processes=processes)
+		parallel_time = time.perf_counter() - start
+
+		print("\tn = {size}: single process {single:.4f}s, parallel "
+			  "{par:.4f}s, speedup {speedup:.2f}".format(
+			size=size,
+			single=single_time,
+			par=parallel_time,
+			speedup=single_time / parallel_time))
+		if (crossover is None) and (parallel_time < single_time):
+			crossover = size
+
+	print("\tCrossover: n = {crossover}".format(crossover=crossover))
+	return crossover
+
+def external_merge_sort_lst(A, memory_budget,
+							max_fan_in=EXTERNAL_SORT_MAX_FAN_IN):
+	"""([int], int, int) -> [int]
+	Sorts A by writing it to a file and running external_merge_sort on it.
+	"""
+	in_handle, in_path = tempfile.mkstemp()
+	out_handle, out_path = tempfile.mkstemp()
+	try:
+		with os.fdopen(in_handle, "wb") as in_file:
+			array("q", A).tofile(in_file)
+		os.close(out_handle)
+		external_merge_sort(in_path, out_path, memory_budget=memory_budget,
+							max_fan_in=max_fan_in)
+		with open(out_path, "rb") as out_file:
+			return list(read_block(out_file, "q", len(A)))
+	finally:
+		os.remove(in_path)
+		os.remove(out_path)
+
+def generate_external_sort_input():
+	"""
+	Random lists along with a memory budget small enough to force many runs,
+	and a fan-in small enough to force several merge passes.
+	"""
+	return (generate_random_arr(random.randint(0, 300)),
+			random.randint(1, 256),
+			random.randint(2, 8))
+
+def generate_parallel_sort_input():
+	"""
+	Random lists (with some duplicates) along with a number of processes.
+	"""
+	return (generate_random_arr(random.randint(0, 300)),
+			random.randint(1, 5))
+
+def generate_sorted_streams():
+	"""
+	Between 0 and 12 sorted lists of random lengths.
+	"""
+	return ([sorted(generate_random_arr(random.randint(0, 25)))
+			 for i in range(random.randint(0, 12))],)
+
 def generate_sorted_arr_pair():
 	return (sorted(generate_random_arr(random.randint(0, 25))),
 			sorted(generate_random_arr(random.randint(0, 25))))
@@ -190,6 +780,28 @@ if __name__ == '__main__':
 	merge_tester.add_function("Recursive Merge", recursive_merge)
 	merge_tester.test_all_functions()
 
+	# Testing k-way Merge (the key version checks that ties keep stream order)
+	k_way_tester = Tester(name="k-way Merge Tester",
+						  num_tests=100,
+						  baseline=lambda streams: sorted(sum(streams, [])),
+						  input_generator=generate_sorted_streams)
+	k_way_tester.add_function("Lazy k-way Merge",
+							  lambda streams: list(lazy_k_way_merge(*streams)))
+	k_way_tester.test_all_functions()
+
+	keyed_k_way_tester = Tester(
+		name="Keyed k-way Merge Tester",
+		num_tests=100,
+		baseline=lambda streams: sorted(sum(streams, []),
+										key=lambda x: x // 5),
+		input_generator=generate_sorted_streams)
+	keyed_k_way_tester.add_function(
+		"Lazy k-way Merge (key = x // 5)",
+		lambda streams: list(lazy_k_way_merge(*streams, key=lambda x: x // 5)))
+	keyed_k_way_tester.test_all_functions()
+
+	benchmark_k_way_merge(num_streams=64, stream_len=2000)
+
 	# Testing MergeSort
 	mergesort_tester = Tester(name="MergeSort Tester",
 							  num_tests=50,
@@ -200,3 +812,62 @@ if __name__ == '__main__':
 	mergesort_tester.add_function("MergeSort Using Recursive Merge",
 								  merge_sort_using_rec)
 	mergesort_tester.test_all_functions()
+
+	# Testing Bottom-Up MergeSort (on lists and arrays, with and without keys)
+	bottom_up_tester = Tester(name="Bottom-Up MergeSort Tester",
+							  num_tests=200,
+							  baseline=lambda A, cutoff: sorted(A),
+							  input_generator=generate_bottom_up_sort_input,
+							  equivalence_fxn=lambda x, y: x == list(y))
+	bottom_up_tester.add_function("Bottom-Up MergeSort",
+								  lambda A, cutoff: bottom_up_merge_sort(
+									  A, cutoff=cutoff))
+	bottom_up_tester.test_all_functions()
+
+	stability_tester = Tester(name="Bottom-Up MergeSort Stability Tester",
+							  num_tests=200,
+							  baseline=lambda A, cutoff: sorted(
+								  A, key=lambda x: x % 5),
+							  input_generator=generate_bottom_up_sort_input,
+							  equivalence_fxn=lambda x, y: x == list(y))
+	stability_tester.add_function("Bottom-Up MergeSort (key = x mod 5)",
+								  lambda A, cutoff: bottom_up_merge_sort(
+									  A, key=lambda x: x % 5, cutoff=cutoff))
+	stability_tester.test_all_functions()
+
+	# Testing External MergeSort
+	external_tester = Tester(name="External MergeSort Tester",
+							 num_tests=100,
+							 baseline=lambda A, memory_budget, max_fan_in: (
+								 sorted(A)),
+							 input_generator=generate_external_sort_input)
+	external_tester.add_function("External MergeSort", external_merge_sort_lst)
+	external_tester.test_all_functions()
+
+	# Testing Parallel MergeSort
+	parallel_tester = Tester(name="Parallel MergeSort Tester",
+							 num_tests=50,
+							 baseline=lambda A, processes: sorted(A),
+							 input_generator=generate_parallel_sort_input)
+	parallel_tester.add_function("Parallel MergeSort", parallel_merge_sort)
+	parallel_tester.test_all_functions()
+
+	benchmark_parallel_merge_sort(geometric_sizes(2 ** 12, 2 ** 18, 4))
+
+	# Checking the cost analysis: T(n) = 2 * T(n / 2) + O(n)
+	# (recursive merge hits the recursion limit at these sizes, so leave it out)
+	mergesort_benchmarker = Tester(name="MergeSort Benchmarker",
+								   num_tests=0,
+								   baseline=sorted,
+								   input_generator=generate_random_tupified_arr)
+	mergesort_benchmarker.add_function("MergeSort Using Iterative Merge",
+									   merge_sort_using_iter)
+	# Sorts a copy, since the benchmarked functions share their inputs
+	mergesort_benchmarker.add_function("Bottom-Up MergeSort",
+									   lambda A: bottom_up_merge_sort(A[:]))
+	mergesort_benchmarker.add_function("Built-in sorted", sorted)
+	mergesort_benchmarker.benchmark(
+		sized_generator=lambda size: (generate_random_arr(size),),
+		sizes=geometric_sizes(2 ** 8, 2 ** 17),
+		recurrences={"MergeSort Using Iterative Merge": Recurrence(2, 2, 1),
+					 "Bottom-Up MergeSort": Recurrence(2, 2, 1)})
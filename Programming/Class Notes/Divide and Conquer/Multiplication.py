@@ -1,6 +1,20 @@
+import io
+import multiprocessing
+import os
 import random
+import sys
+import time
+from array import array
+from multiprocessing.shared_memory import SharedMemory
 
-from Programming.Testing import Tester
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from Programming.Quizzes.MasterTheoremQuiz import Recurrence
+from Programming.Testing import OperationCounter
+from Programming.Testing.Tester import Tester, fit_growth_exponent, geometric_sizes
 
 """
 Multiplication - Divide and Conquer Example 2
@@ -34,6 +48,7 @@ Notes:
 """
 
 #### Convenience functions for doing operations on numerical strings #####
+@OperationCounter.probe("string_multiplication")
 def string_multiplication(A, B):
     """(str, str) -> str"""
     return str(int(A) * int(B))
@@ -52,6 +67,14 @@ def string_subtraction(arr):
         total -= int(num)
     return str(total)
 
+def split_carry(num, num_digits):
+    """(str, int) -> (bool, str)
+    Splits num (below 2 * 10^num_digits) into whether it has a carry digit,
+    and its last num_digits digits (padded with zeroes).
+    """
+    num = num.zfill(num_digits)
+    return (len(num) > num_digits, num[-num_digits:])
+
 def split_in_half(arr):
     """[Object] -> ([Object], [Object])
     """
@@ -172,11 +195,17 @@ Note that:
 """Cost-Analysis
 
 In the algorithm, there are 3 recursive calls:
-    A1_B1_product = div_conq_multiplication(A1, B1)
-    product_sum_A1_A2_sum_B1_B2 = string_multiplication(sum_A1_A2, sum_B1_B2)
-    A2_B2_product = div_conq_multiplication(A2, B2)
+    A1_B1_product = karatsuba_div_conq(A1, B1)
+    product_sum_A1_A2_sum_B1_B2 = karatsuba_div_conq(low_A, low_B)
+    A2_B2_product = karatsuba_div_conq(A2, B2)
 
-Note that (A1, A2, B1, B2) are all size (n / 2), which also means that their sums are size (n / 2):
+Note that (A1, A2, B1, B2) are all size (n / 2), but their sums can carry
+into an extra digit. Write each sum as carry * 10^(n / 2) + low with carry
+0 or 1 and low padded to (n / 2) digits:
+    (cA * 10^h + low_A)(cB * 10^h + low_B)
+        = cA * cB * 10^2h + (cA * low_B + cB * low_A) * 10^h + low_A * low_B
+Multiplying by a carry of 0 or 1 is just adding or not, so low_A * low_B is
+the only multiplication.
 In conclusion, there are THREE recursive calls on instances of size n over TWO
 
 Note that after the recursive call we need to call some for-loops that
@@ -218,14 +247,22 @@ def karatsuba_div_conq(A, B):
         B1, B2 = split_in_half(B)
 
         # Figure out the products
-        A1_B1_product = div_conq_multiplication(A1, B1)
-        A2_B2_product = div_conq_multiplication(A2, B2)
+        A1_B1_product = karatsuba_div_conq(A1, B1)
+        A2_B2_product = karatsuba_div_conq(A2, B2)
 
-        # Use the trick
-        sum_A1_A2 = string_addition([A1, A2])
-        sum_B1_B2 = string_addition([B1, B2])
-        product_sum_A1_A2_sum_B1_B2 = string_multiplication(sum_A1_A2,
-                                                            sum_B1_B2)
+        # Use the trick, splitting the carry off the sums so that the
+        # recursive call gets two numbers of num_digits // 2 digits
+        half = num_digits // 2
+        carry_A, low_A = split_carry(string_addition([A1, A2]), half)
+        carry_B, low_B = split_carry(string_addition([B1, B2]), half)
+        terms = [karatsuba_div_conq(low_A, low_B)]
+        if carry_A:
+            terms += [low_B + "0" * half]
+        if carry_B:
+            terms += [low_A + "0" * half]
+        if carry_A and carry_B:
+            terms += ["1" + "0" * num_digits]
+        product_sum_A1_A2_sum_B1_B2 = string_addition(terms)
         sum_A1B1_A2B2 = string_addition([A1_B1_product, A2_B2_product])
         middle = string_addition([product_sum_A1_A2_sum_B1_B2,
                                   "-" + sum_A1B1_A2B2])
@@ -244,18 +281,1234 @@ def karatsuba_div_conq(A, B):
                                 A2_B2_product])
 
 
-def generate_valid_number_pair():
+"""
+Karatsuba on Limbs
+
+The string versions above spend most of their time converting between
+strings and ints (string_addition, string_multiplication) and padding zeroes
+one character at a time, and they only work when len(A) = len(B) is a power
+of 2.
+
+Instead, write the numbers in base 2 ** LIMB_BITS: a number is a list of
+"limbs" (digits in that base, least significant first). Splitting at limb m is
+then just slicing, "attaching zeroes" is adding into the result at an offset
+of m limbs, and the only string conversions are at the very start and end.
+
+Operands of different lengths are fine:
+    If both have more than m = (longer length) // 2 limbs, do the usual
+    Karatsuba split at m (three recursive products).
+    Otherwise the shorter one fits in the low half, so split only the longer
+    one: A * B = (A1 * B) * (base ** m) + (A0 * B)
+
+Below KARATSUBA_THRESHOLD limbs the bookkeeping costs more than it saves, so
+use the elementary-school algorithm there.
+"""
+LIMB_BITS = 32
+LIMB_MASK = (2 ** LIMB_BITS) - 1
+LIMB_TYPECODE = "I"
+# Measured once on a single development machine; they're rough defaults, not
+# tuned values. calibrate_multiplication_thresholds() measures them on this
+# machine and returns them, and set_multiplication_thresholds() puts saved
+# values back in later runs.
+KARATSUBA_THRESHOLD = 32
+TOOM3_THRESHOLD = 160
+NTT_THRESHOLD = 256
+NTT_BUILTIN_THRESHOLD = 65536
+
+# Both are c * 2^k + 1 with primitive root 3, and 2^23 divides both p - 1
+NTT_PRIMES = (998244353, 469762049)
+NTT_GENERATOR = 3
+NTT_MAX_LENGTH = 2 ** 23
+
+def int_to_limbs(x):
+    """(int) -> [int]
+    Limbs of the natural number x, least significant first.
+    """
+    num_bytes = (x.bit_length() + 7) // 8
+    num_bytes += (-num_bytes) % (LIMB_BITS // 8)
+    limbs = array(LIMB_TYPECODE)
+    limbs.frombytes(x.to_bytes(num_bytes, "little"))
+    return limbs.tolist()
+
+def limbs_to_int(limbs):
+    """([int]) -> int"""
+    return int.from_bytes(array(LIMB_TYPECODE, limbs).tobytes(), "little")
+
+def trim_limbs(limbs):
+    """([int]) -> [int]
+    Removes the leading (most significant) zero limbs, in place.
+    """
+    while limbs and (limbs[-1] == 0):
+        limbs.pop()
+    return limbs
+
+def add_limbs(A, B):
+    """([int], [int]) -> [int]"""
+    if len(A) < len(B):
+        A, B = B, A
+    ret_limbs = list(A)
+    add_limbs_into(ret_limbs, B, 0)
+    return ret_limbs
+
+def add_limbs_into(R, X, shift):
+    """([int], [int], int) -> None
+    R += X * (base ** shift), in place (R grows if it needs to).
+    """
+    carry = 0
+    i = shift
+    for limb in X:
+        if i == len(R):
+            R.append(0)
+        total = R[i] + limb + carry
+        R[i] = total & LIMB_MASK
+        carry = total >> LIMB_BITS
+        i += 1
+    while carry:
+        if i == len(R):
+            R.append(0)
+        total = R[i] + carry
+        R[i] = total & LIMB_MASK
+        carry = total >> LIMB_BITS
+        i += 1
+
+def sub_limbs(A, B):
+    """([int], [int]) -> [int]
+    A - B, for A >= B.
+    """
+    ret_limbs = list(A)
+    borrow = 0
+    for i in range(len(A)):
+        if (i >= len(B)) and (borrow == 0):
+            break
+        total = ret_limbs[i] - (B[i] if i < len(B) else 0) - borrow
+        borrow = 1 if total < 0 else 0
+        ret_limbs[i] = total & LIMB_MASK
+    return trim_limbs(ret_limbs)
+
+def schoolbook_limbs(A, B):
+    """([int], [int]) -> [int]
+    Elementary-school multiplication, O(len(A) * len(B)).
+    """
+    ret_limbs = [0] * (len(A) + len(B))
+    for i, a in enumerate(A):
+        if a == 0:
+            continue
+        carry = 0
+        k = i
+        for b in B:
+            total = ret_limbs[k] + (a * b) + carry
+            ret_limbs[k] = total & LIMB_MASK
+            carry = total >> LIMB_BITS
+            k += 1
+        ret_limbs[k] = carry
+    return trim_limbs(ret_limbs)
+
+def karatsuba_split(A, B):
+    """([int], [int]) -> ([([int], [int])], (([[int]]) -> [int]))
+    One level of Karatsuba: the pairs of limb lists to multiply, and the
+    function that puts their products together into A * B.
+    """
+    m = max(len(A), len(B)) // 2
+    if len(A) < len(B):
+        A, B = B, A
+    length = len(A) + len(B)
+    A0, A1 = trim_limbs(A[:m]), A[m:]
+
+    # B fits in the low half: only split A
+    if len(B) <= m:
+        def combine(products):
+            ret_limbs = [0] * length
+            add_limbs_into(ret_limbs, products[0], 0)
+            add_limbs_into(ret_limbs, products[1], m)
+            return trim_limbs(ret_limbs)
+        return ([(A0, B), (A1, B)], combine)
+
+    B0, B1 = trim_limbs(B[:m]), B[m:]
+
+    # The trick: A0 * B1 + A1 * B0 = (A0 + A1)(B0 + B1) - (A0 * B0 + A1 * B1)
+    def combine(products):
+        low, high, middle = products
+        middle = sub_limbs(sub_limbs(middle, low), high)
+        ret_limbs = [0] * length
+        add_limbs_into(ret_limbs, low, 0)
+        add_limbs_into(ret_limbs, middle, m)
+        add_limbs_into(ret_limbs, high, 2 * m)
+        return trim_limbs(ret_limbs)
+    return ([(A0, B0), (A1, B1), (add_limbs(A0, A1), add_limbs(B0, B1))],
+            combine)
+
+def multiply_split(split):
+    """(([([int], [int])], (([[int]]) -> [int]))) -> [int]
+    Multiplies out the pairs of a split (with multiply_limbs) and combines.
+    """
+    pairs, combine = split
+    return combine([multiply_limbs(X, Y) for X, Y in pairs])
+
+def karatsuba_limbs(A, B):
+    """([int], [int]) -> [int]
+    Karatsuba multiplication of limb lists of any lengths.
+    """
+    return multiply_split(karatsuba_split(A, B))
+
+"""
+Toom-Cook 3-Way Multiplication
+
+Karatsuba treats A as a polynomial of degree 1 in x = base ** m. Split into
+three parts instead, A(x) = a2 * x^2 + a1 * x + a0 (same for B), and the
+product P(x) = A(x) * B(x) has degree 4, so it is pinned down by its values
+at five points. Pick x in {0, 1, -1, -2, infinity} (where "P(infinity)" is the
+top coefficient), because the evaluations there only need additions:
+    A(0) = a0, A(1) = a0 + a1 + a2, A(-1) = a0 - a1 + a2,
+    A(-2) = 2 * (A(-1) + a2) - a0, A(infinity) = a2
+That's five recursive products of size n/3 instead of nine, so
+    T(n) = 5 * T(n / 3) + O(n) -> T(n) \in Theta(n ^ log_3 5) = Theta(n ^ 1.46)
+
+Interpolation (getting P's coefficients back from its five values) only
+needs additions, subtractions and exact divisions by 2 and 3 (Bodrato's
+sequence), but some of the intermediate values are negative. So here numbers
+are (sign, limbs) pairs, with sign 1 or -1.
+"""
+def compare_limbs(A, B):
+    """([int], [int]) -> int
+    -1, 0 or 1 if A < B, A == B or A > B.
+    """
+    if len(A) != len(B):
+        return -1 if len(A) < len(B) else 1
+    for i in range(len(A) - 1, -1, -1):
+        if A[i] != B[i]:
+            return -1 if A[i] < B[i] else 1
+    return 0
+
+def signed_add(X, Y):
+    """((int, [int]), (int, [int])) -> (int, [int])"""
+    (x_sign, x_limbs), (y_sign, y_limbs) = X, Y
+    if x_sign == y_sign:
+        return (x_sign, add_limbs(x_limbs, y_limbs))
+    elif compare_limbs(x_limbs, y_limbs) >= 0:
+        return (x_sign, sub_limbs(x_limbs, y_limbs))
+    else:
+        return (y_sign, sub_limbs(y_limbs, x_limbs))
+
+def signed_sub(X, Y):
+    """((int, [int]), (int, [int])) -> (int, [int])"""
+    return signed_add(X, (-Y[0], Y[1]))
+
+def signed_exact_divide(X, d):
+    """((int, [int]), int) -> (int, [int])
+    X / d for a small d that is known to divide X.
+    """
+    sign, limbs = X
+    quotient = [0] * len(limbs)
+    remainder = 0
+    for i in range(len(limbs) - 1, -1, -1):
+        current = (remainder << LIMB_BITS) | limbs[i]
+        quotient[i] = current // d
+        remainder = current % d
+    return (sign, trim_limbs(quotient))
+
+def toom3_split(A, B):
+    """([int], [int]) -> ([([int], [int])], (([[int]]) -> [int]))
+    One level of Toom-3: the pairs of limb lists to multiply (the magnitudes
+    of the evaluations), and the function that interpolates A * B from their
+    products.
+    """
+    k = (max(len(A), len(B)) + 2) // 3
+    if len(A) < len(B):
+        A, B = B, A
+    length = len(A) + len(B)
+
+    # B fits in the lowest part: splitting it in three would be a waste
+    if len(B) <= k:
+        return karatsuba_split(A, B)
+
+    def evaluate(X):
+        x0 = (1, trim_limbs(X[:k]))
+        x1 = (1, trim_limbs(X[k:2 * k]))
+        x2 = (1, X[2 * k:])
+        x0_plus_x2 = signed_add(x0, x2)
+        at_minus_1 = signed_sub(x0_plus_x2, x1)
+        at_minus_2 = signed_add(at_minus_1, x2)
+        at_minus_2 = signed_sub(signed_add(at_minus_2, at_minus_2), x0)
+        return [x0, signed_add(x0_plus_x2, x1), at_minus_1, at_minus_2, x2]
+
+    # Values of P at 0, 1, -1, -2 and infinity
+    evaluations = list(zip(evaluate(A), evaluate(B)))
+    signs = [a[0] * b[0] for a, b in evaluations]
+
+    def combine(products):
+        r0, r1, r_minus_1, r_minus_2, r_inf = zip(signs, products)
+
+        # Bodrato's interpolation sequence
+        c3 = signed_exact_divide(signed_sub(r_minus_2, r1), 3)
+        c1 = signed_exact_divide(signed_sub(r1, r_minus_1), 2)
+        c2 = signed_sub(r_minus_1, r0)
+        c3 = signed_add(signed_exact_divide(signed_sub(c2, c3), 2),
+                        signed_add(r_inf, r_inf))
+        c2 = signed_sub(signed_add(c2, c1), r_inf)
+        c1 = signed_sub(c1, c3)
+
+        # The coefficients of a product of naturals are naturals
+        ret_limbs = [0] * length
+        for power, (sign, coefficient) in enumerate([r0, c1, c2, c3, r_inf]):
+            add_limbs_into(ret_limbs, coefficient, power * k)
+        return trim_limbs(ret_limbs)
+    return ([(a[1], b[1]) for a, b in evaluations], combine)
+
+def toom3_limbs(A, B):
+    """([int], [int]) -> [int]
+    Toom-Cook 3-way multiplication of limb lists.
+    """
+    return multiply_split(toom3_split(A, B))
+
+"""
+Number-Theoretic Transform Multiplication
+
+Reading the limbs as coefficients, A * B is the convolution of the two
+coefficient lists followed by carrying. The FFT does a convolution of n
+coefficients in O(n log n): evaluate both polynomials at the n-th roots of
+unity (divide and conquer on even and odd coefficients, each level is O(n)),
+multiply pointwise, and interpolate back with the inverse transform.
+
+Over the complex numbers that has rounding error. Instead work modulo a
+prime p with 2^k | p - 1: then Z_p has n-th roots of unity for every power
+of two n <= 2^k, the same transform works and everything is exact. A product
+coefficient is at most n * (2^16 - 1)^2 < 2^55 when the limbs are cut into
+16-bit digits, so the convolution is computed modulo two ~30-bit primes and
+recombined with the Chinese Remainder Theorem (p1 * p2 > 2^58). All of the
+arithmetic fits in 64-bit words, so each butterfly pass is a few NumPy array
+operations.
+    T(n) = 2 * T(n / 2) + O(n) -> T(n) \in Theta(n log n)
+"""
+_bit_reversals = {}
+
+def _bit_reversal(n):
+    """(int) -> np.ndarray
+    Index permutation that reverses the bits of 0..n-1 (n a power of 2).
+    """
+    if n not in _bit_reversals:
+        bits = n.bit_length() - 1
+        indices = np.arange(n, dtype=np.int64)
+        reversal = np.zeros(n, dtype=np.int64)
+        for bit in range(bits):
+            reversal |= ((indices >> bit) & 1) << (bits - 1 - bit)
+        _bit_reversals[n] = reversal
+    return _bit_reversals[n]
+
+def _powers_mod(w, count, prime):
+    """(int, int, int) -> np.ndarray
+    w^0, w^1, ..., w^(count - 1) modulo prime, by repeated doubling.
+    """
+    powers = np.ones(1, dtype=np.uint64)
+    while len(powers) < count:
+        step = np.uint64(pow(w, len(powers), prime))
+        powers = np.concatenate((powers, powers * step % np.uint64(prime)))
+    return powers[:count]
+
+def ntt(a, prime, inverse=False):
+    """(np.ndarray, int, bool) -> np.ndarray
+    Iterative (Cooley-Tukey) number-theoretic transform of a (uint64, with a
+    power of 2 length, entries below prime) modulo prime.
+    """
+    n = len(a)
+    p = np.uint64(prime)
+    a = a[_bit_reversal(n)]
+    length = 2
+    while length <= n:
+        half = length // 2
+        w = pow(NTT_GENERATOR, (prime - 1) // length, prime)
+        if inverse:
+            w = pow(w, prime - 2, prime)
+        blocks = a.reshape(-1, length)
+        evens = blocks[:, :half]
+        odds = blocks[:, half:] * _powers_mod(w, half, prime) % p
+        a = np.concatenate(((evens + odds) % p, (evens + p - odds) % p),
+                           axis=1).ravel()
+        length *= 2
+    if inverse:
+        a = a * np.uint64(pow(n, prime - 2, prime)) % p
+    return a
+
+def ntt_fits(A, B):
+    """([int], [int]) -> bool
+    Whether the product of A and B is short enough for ntt_limbs.
+    """
+    return 2 * (len(A) + len(B)) <= NTT_MAX_LENGTH
+
+def ntt_limbs(A, B):
+    """([int], [int]) -> [int]
+    Multiplies two limb lists with a number-theoretic transform modulo each
+    of NTT_PRIMES, recombined with the CRT.
+    """
+    if np is None:
+        raise ImportError("ntt_limbs needs NumPy")
+    if not (A and B):
+        return []
+    if not ntt_fits(A, B):
+        raise ValueError("Product of {a} and {b} limbs is too long for "
+                         "the NTT".format(a=len(A), b=len(B)))
+
+    # Little-endian 16-bit digits of each number
+    x = np.array(A, dtype="<u4").view("<u2").astype(np.uint64)
+    y = np.array(B, dtype="<u4").view("<u2").astype(np.uint64)
+    size = 1 << (len(x) + len(y) - 2).bit_length()
+
+    residues = []
+    for prime in NTT_PRIMES:
+        p = np.uint64(prime)
+        x_hat = ntt(np.pad(x, (0, size - len(x))), prime)
+        y_hat = ntt(np.pad(y, (0, size - len(y))), prime)
+        residues += [ntt(x_hat * y_hat % p, prime, inverse=True)]
+
+    # Garner's CRT: c = r1 + p1 * ((r2 - r1) * p1^-1 mod p2)
+    p1, p2 = NTT_PRIMES
+    r1, r2 = residues
+    t = (r2 + np.uint64(p2) - (r1 % np.uint64(p2))) % np.uint64(p2)
+    t = t * np.uint64(pow(p1, -1, p2)) % np.uint64(p2)
+    coefficients = r1 + (t * np.uint64(p1))
+
+    # Carrying: the sum of coefficients[i] * 2^(16 i), split into 16-bit
+    # fields so each field lines up with the digits
+    product = 0
+    for field in range(4):
+        digits = (coefficients >> np.uint64(16 * field)) & np.uint64(0xFFFF)
+        product += int.from_bytes(digits.astype("<u2").tobytes(),
+                                  "little") << (16 * field)
+    return int_to_limbs(product)
+
+def multiply_limbs(A, B):
+    """([int], [int]) -> [int]
+    Multiplies two limb lists with the algorithm suited to their size.
+    """
+    shorter = min(len(A), len(B))
+    if shorter == 0:
+        return []
+    elif shorter < KARATSUBA_THRESHOLD:
+        return schoolbook_limbs(A, B)
+    elif shorter < TOOM3_THRESHOLD:
+        return karatsuba_limbs(A, B)
+    elif (np is None) or (shorter < NTT_THRESHOLD) or not ntt_fits(A, B):
+        # Toom-3 also breaks products too long for the NTT into pieces
+        return toom3_limbs(A, B)
+    else:
+        return ntt_limbs(A, B)
+
+"""
+Parallel Multiplication
+
+The subproducts of one level of Karatsuba (3) or Toom-3 (5) don't depend on
+each other, so for huge operands the top few levels can be expanded into a
+list of independent products (3^depth or 5^depth of them) that a pool of
+processes multiplies at the same time. Below the depth cutoff each product
+is done sequentially in its worker by multiply_limbs, and the combining at
+the top levels (additions and shifts, O(n) per level) stays in this process.
+
+The operands of all the products are written into one shared memory buffer
+and the products into another, so workers only get offsets, not pickled
+lists of limbs.
+"""
+PARALLEL_MULTIPLY_THRESHOLD = 4096
+
+def _expand_products(A, B, depth, pairs):
+    """([int], [int], int, [([int], [int])]) -> int or tuple
+    Expands depth levels of splits of A * B. The products at the bottom are
+    appended to pairs, and the returned tree says how to combine them: an int
+    is an index into pairs, a tuple is (combine, subtrees).
+    """
+    shorter = min(len(A), len(B))
+    if (depth == 0) or (shorter < KARATSUBA_THRESHOLD):
+        pairs.append((A, B))
+        return len(pairs) - 1
+
+    # Toom-3 has more pieces to hand out, but the NTT is quasi-linear so
+    # splitting its operands wastes less with Karatsuba
+    if TOOM3_THRESHOLD <= shorter < NTT_THRESHOLD:
+        split_pairs, combine = toom3_split(A, B)
+    else:
+        split_pairs, combine = karatsuba_split(A, B)
+    return (combine, [_expand_products(X, Y, depth - 1, pairs)
+                      for X, Y in split_pairs])
+
+def _combine_products(tree, products):
+    """(int or tuple, [[int]]) -> [int]"""
+    if isinstance(tree, int):
+        return products[tree]
+    combine, subtrees = tree
+    return combine([_combine_products(subtree, products)
+                    for subtree in subtrees])
+
+def _multiply_shared_pair(task):
+    """((str, str, int, int, int, int, int)) -> None
+    Worker: multiplies the operands at [x_lo, x_hi) and [x_hi, y_hi) of the
+    named operand buffer, and writes the product (zero padded) from out_lo in
+    the named product buffer.
+    """
+    operand_name, product_name, x_lo, x_hi, y_hi, out_lo, out_hi = task
+    operand_shared = SharedMemory(name=operand_name)
+    product_shared = SharedMemory(name=product_name)
+    operands = operand_shared.buf.cast(LIMB_TYPECODE)
+    products = product_shared.buf.cast(LIMB_TYPECODE)
+    try:
+        product = multiply_limbs(operands[x_lo:x_hi].tolist(),
+                                 operands[x_hi:y_hi].tolist())
+        product += [0] * ((out_hi - out_lo) - len(product))
+        products[out_lo:out_hi] = array(LIMB_TYPECODE, product)
+    finally:
+        operands.release()
+        products.release()
+        operand_shared.close()
+        product_shared.close()
+
+def parallel_multiply_limbs(A, B, processes=None, depth=None):
+    """([int], [int], int, int) -> [int]
+
+    A * B with the subproducts of the top depth levels of Karatsuba / Toom-3
+    multiplied in a pool of processes (one per core by default). depth
+    defaults to the fewest levels giving at least one product per process.
+    Small operands (below PARALLEL_MULTIPLY_THRESHOLD limbs) or a single
+    process just use multiply_limbs.
+    """
+    if processes is None:
+        processes = os.cpu_count()
+    if (processes < 2) or (min(len(A), len(B)) < PARALLEL_MULTIPLY_THRESHOLD):
+        return multiply_limbs(A, B)
+    if depth is None:
+        depth = 1
+        while 3 ** depth < processes:
+            depth += 1
+
+    pairs = []
+    tree = _expand_products(A, B, depth, pairs)
+
+    # Layout of the two shared buffers
+    operand_bounds = [0]
+    product_bounds = [0]
+    for X, Y in pairs:
+        operand_bounds += [operand_bounds[-1] + len(X) + len(Y)]
+        product_bounds += [product_bounds[-1] + len(X) + len(Y)]
+
+    item_size = array(LIMB_TYPECODE).itemsize
+    operand_shared = SharedMemory(create=True,
+                                  size=max(1, operand_bounds[-1]) * item_size)
+    product_shared = SharedMemory(create=True,
+                                  size=max(1, product_bounds[-1]) * item_size)
+    try:
+        operands = operand_shared.buf.cast(LIMB_TYPECODE)
+        for (X, Y), lo in zip(pairs, operand_bounds):
+            operands[lo:lo + len(X)] = array(LIMB_TYPECODE, X)
+            operands[lo + len(X):lo + len(X) + len(Y)] = array(LIMB_TYPECODE, Y)
+        operands.release()
+
+        tasks = [(operand_shared.name, product_shared.name,
+                  operand_bounds[i], operand_bounds[i] + len(X),
+                  operand_bounds[i + 1], product_bounds[i], product_bounds[i + 1])
+                 for i, (X, Y) in enumerate(pairs)]
+        with multiprocessing.Pool(processes) as pool:
+            pool.map(_multiply_shared_pair, tasks)
+
+        products = product_shared.buf.cast(LIMB_TYPECODE)
+        product_limbs = [trim_limbs(products[lo:hi].tolist()) for lo, hi in
+                         zip(product_bounds, product_bounds[1:])]
+        products.release()
+        return _combine_products(tree, product_limbs)
+    finally:
+        for shared in (operand_shared, product_shared):
+            shared.close()
+            shared.unlink()
+
+def benchmark_parallel_multiplication(num_digits, process_counts):
+    """(int, [int]) -> None
+    Times parallel_multiply_limbs with each number of processes against
+    multiply_limbs, on two random numbers with num_digits digits.
+    """
+    print("Parallel Multiplication Benchmark ({n} digits, {cores} cores):".format(
+        n=num_digits, cores=os.cpu_count()))
+    x_limbs = int_to_limbs(random.getrandbits(int(num_digits * 3.33)))
+    y_limbs = int_to_limbs(random.getrandbits(int(num_digits * 3.33)))
+    sequential_time = _best_time(multiply_limbs, (x_limbs, y_limbs), 1)
+    print("\tsequential: {time:.4f}s".format(time=sequential_time))
+    for processes in process_counts:
+        parallel_time = _best_time(parallel_multiply_limbs,
+                                   (x_limbs, y_limbs, processes), 1)
+        print("\t{p} processes: {time:.4f}s, speedup {speedup:.2f}".format(
+            p=processes, time=parallel_time,
+            speedup=sequential_time / parallel_time))
+
+def multiply_ints(x, y):
+    """(int, int) -> int
+    x * y, with the NTT for operands past NTT_BUILTIN_THRESHOLD limbs (the
+    built-in multiplication is faster than the other limb algorithms).
+    """
+    shorter = min(abs(x).bit_length(), abs(y).bit_length())
+    if (np is None) or (shorter < NTT_BUILTIN_THRESHOLD * LIMB_BITS):
+        return x * y
+    product = limbs_to_int(multiply_limbs(int_to_limbs(abs(x)),
+                                          int_to_limbs(abs(y))))
+    return -product if (x < 0) != (y < 0) else product
+
+
+"""
+Newton Division
+
+A quotient a // m is a multiplication by a reciprocal: with n = bits of m
+and R = floor(2^(2n) / m), q = (a * R) >> 2n is at most 2 short of a // m
+for any a < 2^(2n), and the remainder a - q * m says exactly how short.
+
+R comes from Newton's iteration for f(X) = 2^(2n) / X - m, which doubles the
+number of correct bits every step:
+    X' = 2 * X - ((m * X^2) >> 2n)
+So start from the reciprocal of the top half of m (recursively, shifted up
+into place), do one step, and fix the last few units exactly by checking the
+sign and size of 2^(2n) - m * X. That's two multiplications at each size,
+    T(n) = T(n / 2) + O(M(n)) -> T(n) \in O(M(n))
+A Reciprocal keeps R for one divisor, so repeated reductions modulo the same
+m are just multiplications. A dividend with more than 2n bits is divided
+n bits at a time from the top, like long division with base 2^n.
+
+Below DIVISION_THRESHOLD bits the built-in (quadratic) division is faster.
+"""
+DIVISION_THRESHOLD = 2 ** 17
+
+def newton_reciprocal(m):
+    """(int) -> int
+    floor(2^(2n) / m), where n is the number of bits of the natural m.
+    """
+    n = m.bit_length()
+    if n <= DIVISION_THRESHOLD:
+        return (1 << (2 * n)) // m
+
+    # Reciprocal of the top h bits of m, moved into place: about h bits right
+    h = (n + 1) // 2 + 1
+    shift = n - h
+    X = newton_reciprocal(m >> shift) << shift
+
+    # One Newton step gets about 2h > n bits right
+    X = 2 * X - (multiply_ints(m, multiply_ints(X, X)) >> (2 * n))
+
+    # Exact correction: 0 <= 2^(2n) - m * X < m
+    remainder = (1 << (2 * n)) - multiply_ints(m, X)
+    while remainder < 0:
+        X -= 1
+        remainder += m
+    while remainder >= m:
+        X += 1
+        remainder -= m
+    return X
+
+def _join_chunks(chunks, bits):
+    """([int], int) -> int
+    The number with the given base 2^bits digits (most significant first),
+    joined in halves so it doesn't take quadratic time.
+    """
+    if len(chunks) == 1:
+        return chunks[0]
+    half = len(chunks) // 2
+    return ((_join_chunks(chunks[:half], bits) << (bits * (len(chunks) - half)))
+            | _join_chunks(chunks[half:], bits))
+
+class Reciprocal():
+    """
+    A fixed divisor m with its reciprocal precomputed, for dividing many
+    numbers by m.
+    """
 
-    desired_length = 2 ** random.randint(1, 3)
+    def __init__(self, m):
+        """(Reciprocal, int) -> None"""
+        if m <= 0:
+            raise ValueError("Divisor must be positive, got {m}".format(m=m))
+        self.m = m
+        self.bits = m.bit_length()
+        self.inverse = newton_reciprocal(m)
+
+    def _divmod_short(self, a):
+        """(Reciprocal, int) -> (int, int)
+        divmod(a, m) for a natural a < 2^(2n).
+        """
+        q = multiply_ints(a, self.inverse) >> (2 * self.bits)
+        r = a - multiply_ints(q, self.m)
+        while r >= self.m:
+            q += 1
+            r -= self.m
+        return (q, r)
+
+    def divmod(self, a):
+        """(Reciprocal, int) -> (int, int)
+        divmod(a, m), with Python's rounding for negative a.
+        """
+        if a < 0:
+            q, r = self.divmod(-a)
+            return (-q, 0) if r == 0 else (-q - 1, self.m - r)
+        if a.bit_length() <= 2 * self.bits:
+            return self._divmod_short(a)
+
+        # Long division with base 2^n digits: the remainder is below m, so
+        # (remainder, next digit) is below 2^(2n)
+        n = self.bits
+        num_chunks = (a.bit_length() + n - 1) // n
+        quotient_chunks = []
+        r = 0
+        for i in range(num_chunks - 1, -1, -1):
+            chunk = (a >> (n * i)) & ((1 << n) - 1)
+            q, r = self._divmod_short((r << n) | chunk)
+            quotient_chunks.append(q)
+        return (_join_chunks(quotient_chunks, n), r)
+
+    def mod(self, a):
+        """(Reciprocal, int) -> int"""
+        return self.divmod(a)[1]
+
+def newton_divmod(a, b):
+    """(int, int) -> (int, int)
+    divmod(a, b) using a Newton reciprocal of b when b is big.
+    """
+    if b == 0:
+        raise ZeroDivisionError("newton_divmod by zero")
+    if b < 0:
+        q, r = newton_divmod(-a, -b)
+        return (q, -r)
+    if (b.bit_length() <= DIVISION_THRESHOLD) or (abs(a) < b):
+        return divmod(a, b)
+    return Reciprocal(b).divmod(a)
+
+def benchmark_division(bit_sizes):
+    """([int]) -> None
+    Times newton_divmod, and a Reciprocal made beforehand, against the
+    built-in divmod on a random 2n-bit number divided by a random n-bit one.
+    """
+    print("Newton Division Benchmark:")
+    for bits in bit_sizes:
+        m = random.getrandbits(bits) | (1 << (bits - 1))
+        a = random.getrandbits(2 * bits)
+        reciprocal = Reciprocal(m)
+        print("\t{n} bits: newton_divmod {newton:.4f}s, cached reciprocal "
+              "{cached:.4f}s, built-in {builtin:.4f}s".format(
+                  n=bits,
+                  newton=_best_time(newton_divmod, (a, m), 1),
+                  cached=_best_time(reciprocal.divmod, (a,), 1),
+                  builtin=_best_time(divmod, (a, m), 1)))
+
+"""
+Decimal Conversion
+
+CPython's int(str) and str(int) are quadratic in the number of digits, so for
+big enough numbers converting the operands costs more than multiplying them.
+Both directions are divide and conquer on a power of ten, 10^(2^i):
+    int(high digits) * 10^(2^i) + int(low 2^i digits)
+    divmod(x, 10^(2^i)) -> str(quotient) + str(remainder) padded to 2^i
+The powers 10^(2^i) are computed once (by squaring) and cached, and so are
+their Newton reciprocals for the divisions. With a multiplication costing M(n),
+    T(n) = 2 * T(n / 2) + M(n) -> T(n) \in O(M(n) log n)
+Below DECIMAL_CONVERSION_THRESHOLD digits the built-in conversions are used
+(which also stays under CPython's limit on their length), and the divisions
+by powers below DIVISION_THRESHOLD bits use the built-in (quadratic) divmod,
+so only the levels above that get the O(M(n) log n) bound.
+"""
+DECIMAL_CONVERSION_THRESHOLD = 2048
+
+# _decimal_powers[i] = 10 ^ (2 ^ i)
+_decimal_powers = [10]
+
+def decimal_power(i):
+    """(int) -> int
+    10 ^ (2 ^ i), from the cache (i must be a natural number).
+    """
+    if i < 0:
+        raise ValueError("i must be a natural number, not {i}".format(i=i))
+    while len(_decimal_powers) <= i:
+        _decimal_powers.append(multiply_ints(_decimal_powers[-1],
+                                             _decimal_powers[-1]))
+    return _decimal_powers[i]
+
+# _decimal_reciprocals[i] = Reciprocal(10 ^ (2 ^ i)), for the big ones
+_decimal_reciprocals = {}
+
+def _divmod_decimal_power(x, i):
+    """(int, int) -> (int, int)
+    divmod(x, 10 ^ (2 ^ i)). Powers of up to DIVISION_THRESHOLD bits use the
+    built-in divmod, which is quadratic, so that part of int_to_decimal stays
+    quadratic. Bigger powers divide with their cached Reciprocal, in O(M(n)).
+    """
+    power = decimal_power(i)
+    if power.bit_length() <= DIVISION_THRESHOLD:
+        return divmod(x, power)
+    if i not in _decimal_reciprocals:
+        _decimal_reciprocals[i] = Reciprocal(power)
+    return _decimal_reciprocals[i].divmod(x)
+
+def decimal_to_int(digits):
+    """(str) -> int
+    The value of a decimal string (possibly negative).
+    """
+    if digits.startswith("-"):
+        return -decimal_to_int(digits[1:])
+    if len(digits) <= DECIMAL_CONVERSION_THRESHOLD:
+        return int(digits)
+
+    # Largest power of 2 below the number of digits
+    i = (len(digits) - 1).bit_length() - 1
+    high = decimal_to_int(digits[:-(2 ** i)])
+    low = decimal_to_int(digits[-(2 ** i):])
+    return multiply_ints(high, decimal_power(i)) + low
+
+def _decimal_pieces(x, width):
+    """(int, int) -> generator of str
+    The digits of the natural number x, most significant first, in pieces.
+    If width is given the digits are padded with zeros to width.
+    """
+    # Smallest i with x < 10 ^ (2 ^ i), found from the bit length (x < 10
+    # gives i = 0, and there is no smaller power to check)
+    approx_digits = (x.bit_length() * 30103) // 100000 + 1
+    i = (approx_digits - 1).bit_length()
+    if (i > 0) and (x < decimal_power(i - 1)):
+        i -= 1
+    if 2 ** i <= DECIMAL_CONVERSION_THRESHOLD:
+        yield str(x).zfill(width)
+        return
+
+    # 10^(2^(i-1)) <= x < 10^(2^i), so both halves have about 2^(i-1) digits
+    high, low = _divmod_decimal_power(x, i - 1)
+    yield from _decimal_pieces(high, max(width - (2 ** (i - 1)), 0))
+    yield from _decimal_pieces(low, 2 ** (i - 1))
+
+def int_to_decimal(x):
+    """(int) -> str
+    The decimal string of x.
+    """
+    sign = "-" if x < 0 else ""
+    return sign + "".join(_decimal_pieces(abs(x), 0))
+
+def write_decimal(x, file):
+    """(int, file) -> None
+    Writes the decimal string of x to the (text) file as it is produced,
+    without building the whole string in memory.
+    """
+    if x < 0:
+        file.write("-")
+    for piece in _decimal_pieces(abs(x), 0):
+        file.write(piece)
+
+def limb_multiplication(A, B, multiplier=multiply_limbs):
+    """(str, str, (([int], [int]) -> [int])) -> str
+    Multiplies two decimal strings (of any lengths, possibly negative) using
+    multiplier on their limbs (multiply_limbs picks the algorithm by size).
+    """
+    negative = A.startswith("-") != B.startswith("-")
+    product = limbs_to_int(multiplier(int_to_limbs(abs(decimal_to_int(A))),
+                                      int_to_limbs(abs(decimal_to_int(B)))))
+    if negative and (product != 0):
+        return "-" + int_to_decimal(product)
+    return int_to_decimal(product)
+
+"""
+Polynomial Multiplication
+
+Take away the carries and Karatsuba is a polynomial multiplication: with
+P(x) = P1(x) * x^h + P0(x) (same for Q),
+    P * Q = P1Q1 * x^2h + ((P0 + P1)(Q0 + Q1) - P0Q0 - P1Q1) * x^h + P0Q0
+Here the coefficients are NumPy arrays whose last axis is the coefficient
+(lowest degree first) and whose leading axes are a batch, so each step of the
+recursion works on every pair in the batch at once. If one polynomial is
+longer, it is cut into pieces as long as the shorter one, and the products of
+the pieces are added in at their offsets.
+
+    direct:    O(n * m), loops over the shorter polynomial's coefficients
+    karatsuba: O(n * m ^ 0.58), direct below POLY_KARATSUBA_THRESHOLD
+    fft:       O(n log n), but in floating point: integer results are
+               rounded, so it is only used for integers when the estimated
+               rounding error is below POLY_FFT_MAX_ERROR
+The usual estimate of the error of a floating-point FFT convolution of length
+N is
+    ||P|| * ||Q|| * 2^-53 * POLY_FFT_ERROR_FACTOR * log2(N)
+(|| || is the Euclidean norm of the coefficients). It's a heuristic rather
+than a proof, but it grows with both the coefficients and the length.
+"""
+POLY_KARATSUBA_THRESHOLD = 32
+POLY_FFT_THRESHOLD = 64
+POLY_FFT_ERROR_FACTOR = 5
+POLY_FFT_MAX_ERROR = 0.25
+
+def _direct_polynomial_multiply(P, Q):
+    """(np.ndarray, np.ndarray) -> np.ndarray"""
+    if P.shape[-1] < Q.shape[-1]:
+        P, Q = Q, P
+    n, m = P.shape[-1], Q.shape[-1]
+    batch = np.broadcast_shapes(P.shape[:-1], Q.shape[:-1])
+    product = np.zeros(batch + (n + m - 1,), dtype=np.result_type(P, Q))
+    for j in range(m):
+        product[..., j:j + n] += P * Q[..., j:j + 1]
+    return product
+
+def _pad_to(P, length):
+    """(np.ndarray, int) -> np.ndarray
+    P with zero coefficients added on the high end, up to length.
+    """
+    padding = [(0, 0)] * (P.ndim - 1) + [(0, length - P.shape[-1])]
+    return np.pad(P, padding)
+
+def _karatsuba_polynomial_multiply(P, Q):
+    """(np.ndarray, np.ndarray) -> np.ndarray"""
+    n, m = P.shape[-1], Q.shape[-1]
+    if min(n, m) < POLY_KARATSUBA_THRESHOLD:
+        return _direct_polynomial_multiply(P, Q)
+    if n != m:
+        if n < m:
+            P, Q, n, m = Q, P, m, n
+        # Cut P into pieces of m coefficients (the last may be shorter)
+        batch = np.broadcast_shapes(P.shape[:-1], Q.shape[:-1])
+        product = np.zeros(batch + (n + m - 1,), dtype=np.result_type(P, Q))
+        for start in range(0, n, m):
+            piece = _karatsuba_polynomial_multiply(P[..., start:start + m], Q)
+            product[..., start:start + piece.shape[-1]] += piece
+        return product
+
+    h = n // 2
+    P0, P1 = P[..., :h], P[..., h:]
+    Q0, Q1 = Q[..., :h], Q[..., h:]
+    low = _karatsuba_polynomial_multiply(P0, Q0)
+    high = _karatsuba_polynomial_multiply(P1, Q1)
+    middle = _karatsuba_polynomial_multiply(_pad_to(P0, n - h) + P1,
+                                            _pad_to(Q0, n - h) + Q1)
+    middle[..., :2 * h - 1] -= low
+    middle -= high
+
+    batch = np.broadcast_shapes(low.shape[:-1], high.shape[:-1])
+    product = np.zeros(batch + (2 * n - 1,), dtype=middle.dtype)
+    product[..., :2 * h - 1] += low
+    product[..., 2 * h:] += high
+    product[..., h:h + middle.shape[-1]] += middle
+    return product
+
+def _fft_polynomial_multiply(P, Q):
+    """(np.ndarray, np.ndarray) -> np.ndarray"""
+    length = P.shape[-1] + Q.shape[-1] - 1
+    size = 1 << (length - 1).bit_length()
+    if np.iscomplexobj(P) or np.iscomplexobj(Q):
+        product = np.fft.ifft(np.fft.fft(P, size) * np.fft.fft(Q, size), size)
+    else:
+        product = np.fft.irfft(np.fft.rfft(P, size) * np.fft.rfft(Q, size),
+                               size)
+    product = product[..., :length]
+
+    result_type = np.result_type(P, Q)
+    if np.issubdtype(result_type, np.integer):
+        return np.rint(product).astype(result_type)
+    return product.astype(np.result_type(result_type, np.float64))
+
+def _fft_is_exact(P, Q):
+    """(np.ndarray, np.ndarray) -> bool
+    Whether the FFT's estimated rounding error is small enough for rounding
+    to give the exact integer product (see the notes above).
+    """
+    if not (np.issubdtype(P.dtype, np.integer) and
+            np.issubdtype(Q.dtype, np.integer)):
+        return True
+    length = P.shape[-1] + Q.shape[-1] - 1
+    norms = [np.sqrt(np.square(X.astype(np.float64)).sum(axis=-1)).max()
+             for X in (P, Q)]
+    error = (norms[0] * norms[1] * (2.0 ** -53) * POLY_FFT_ERROR_FACTOR *
+             max((length - 1).bit_length(), 1))
+    return error < POLY_FFT_MAX_ERROR
+
+POLYNOMIAL_MULTIPLIERS = {"direct": _direct_polynomial_multiply,
+                          "karatsuba": _karatsuba_polynomial_multiply,
+                          "fft": _fft_polynomial_multiply}
+
+def polynomial_multiply(P, Q, method=None):
+    """(array_like, array_like, str) -> np.ndarray
+
+    Products of the polynomials in P and Q, with coefficients along the last
+    axis (lowest degree first) and any leading (batch) axes broadcast against
+    each other: shapes (..., n) and (..., m) give (..., n + m - 1). method is
+    one of POLYNOMIAL_MULTIPLIERS, or None to choose by size.
+    """
+    if np is None:
+        raise ImportError("polynomial_multiply needs NumPy")
+    P, Q = np.asarray(P), np.asarray(Q)
+    if (P.ndim == 0) or (Q.ndim == 0) or (0 in (P.shape[-1], Q.shape[-1])):
+        raise ValueError("Polynomials need at least one coefficient")
+
+    if method is None:
+        shorter = min(P.shape[-1], Q.shape[-1])
+        if shorter < POLY_KARATSUBA_THRESHOLD:
+            method = "direct"
+        elif (shorter >= POLY_FFT_THRESHOLD) and _fft_is_exact(P, Q):
+            method = "fft"
+        else:
+            method = "karatsuba"
+    elif method not in POLYNOMIAL_MULTIPLIERS:
+        raise ValueError("Unknown method {method}, expected one of "
+                         "{methods}".format(method=method,
+                                            methods=list(POLYNOMIAL_MULTIPLIERS)))
+    return POLYNOMIAL_MULTIPLIERS[method](P, Q)
+
+def benchmark_polynomial_multiply(lengths, batch_size=256):
+    """([int], int) -> None
+    Times each method on batch_size pairs of integer polynomials of each
+    length, against np.convolve called once per pair.
+    """
+    print("Polynomial Multiplication Benchmark ({batch} pairs):".format(
+        batch=batch_size))
+    for length in lengths:
+        P = np.random.randint(0, 1000, size=(batch_size, length))
+        Q = np.random.randint(0, 1000, size=(batch_size, length))
+        times = {method: _best_time(polynomial_multiply, (P, Q, method), 1)
+                 for method in POLYNOMIAL_MULTIPLIERS}
+        times["np.convolve loop"] = _best_time(
+            lambda: [np.convolve(p, q) for p, q in zip(P, Q)], (), 1)
+        print("\t{n} coefficients: ".format(n=length) + ", ".join(
+            "{method} {time:.4f}s".format(method=method, time=time)
+            for method, time in times.items()))
+
+def _best_time(fxn, args, repeats):
+    """(((Unknown) -> Unknown), (Unknown), int) -> float"""
+    best = float("inf")
+    for i in range(repeats):
+        start = time.perf_counter()
+        fxn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def calibrate_multiplication_thresholds(candidates=(8, 12, 16, 24, 32, 48, 64,
+                                                    96, 128, 192, 256, 384),
+                                        ntt_candidates=(64, 128, 256, 512, 1024,
+                                                        2048, 4096, 8192),
+                                        builtin_candidates=(8192, 16384, 32768,
+                                                            65536, 131072),
+                                        repeats=5):
+    """([int], [int], [int], int) -> (int, int, int, int)
+
+    Picks KARATSUBA_THRESHOLD, TOOM3_THRESHOLD, NTT_THRESHOLD and
+    NTT_BUILTIN_THRESHOLD for this machine, sets them and returns them (save
+    the tuple and pass it to set_multiplication_thresholds to reuse it). For
+    each candidate size n (in limbs), one level of the faster algorithm (with
+    the slower one below it) is timed against the slower algorithm on its
+    own; the threshold is the first n where one level of the faster algorithm
+    wins. The NTT has no levels, so it is timed against everything else at
+    each size (and, conversions included, against the built-in *). An
+    algorithm that never wins is never used.
+    """
+    global KARATSUBA_THRESHOLD, TOOM3_THRESHOLD, NTT_THRESHOLD
+    global NTT_BUILTIN_THRESHOLD
+    never = 2 ** 62
+
+    def random_limbs(n):
+        return int_to_limbs(random.getrandbits(n * LIMB_BITS) |
+                            (1 << ((n * LIMB_BITS) - 1)))
+
+    NTT_THRESHOLD = never
+    TOOM3_THRESHOLD = never
+    for n in candidates:
+        x, y = random_limbs(n), random_limbs(n)
+        # The halves of n are below the threshold, so they use schoolbook
+        KARATSUBA_THRESHOLD = n
+        if (_best_time(karatsuba_limbs, (x, y), repeats) <
+                _best_time(schoolbook_limbs, (x, y), repeats)):
+            break
+    else:
+        # Karatsuba lost at every size, so never switch to it
+        KARATSUBA_THRESHOLD = never
+
+    for n in candidates:
+        if n < KARATSUBA_THRESHOLD:
+            continue
+        x, y = random_limbs(n), random_limbs(n)
+        # The thirds of n are below the threshold, so they use Karatsuba
+        TOOM3_THRESHOLD = n
+        if (_best_time(toom3_limbs, (x, y), repeats) <
+                _best_time(karatsuba_limbs, (x, y), repeats)):
+            break
+        # Toom-3 lost here, so leave it off until it wins somewhere
+        TOOM3_THRESHOLD = never
+
+    if np is not None:
+        for n in ntt_candidates:
+            x, y = random_limbs(n), random_limbs(n)
+            if (_best_time(ntt_limbs, (x, y), repeats) <
+                    _best_time(multiply_limbs, (x, y), repeats)):
+                NTT_THRESHOLD = n
+                break
+
+    NTT_BUILTIN_THRESHOLD = never
+    if np is not None:
+        def ntt_ints(x, y):
+            return limbs_to_int(ntt_limbs(int_to_limbs(x), int_to_limbs(y)))
+
+        for n in builtin_candidates:
+            x, y = (random.getrandbits(n * LIMB_BITS) for i in range(2))
+            if (_best_time(ntt_ints, (x, y), 1) <
+                    _best_time(int.__mul__, (x, y), 1)):
+                NTT_BUILTIN_THRESHOLD = n
+                break
+
+    return (KARATSUBA_THRESHOLD, TOOM3_THRESHOLD, NTT_THRESHOLD,
+            NTT_BUILTIN_THRESHOLD)
+
+def set_multiplication_thresholds(karatsuba, toom3, ntt, ntt_builtin):
+    """(int, int, int, int) -> None
+    Sets the thresholds, in the order calibrate_multiplication_thresholds
+    returns them.
+    """
+    global KARATSUBA_THRESHOLD, TOOM3_THRESHOLD, NTT_THRESHOLD
+    global NTT_BUILTIN_THRESHOLD
+    (KARATSUBA_THRESHOLD, TOOM3_THRESHOLD, NTT_THRESHOLD,
+     NTT_BUILTIN_THRESHOLD) = karatsuba, toom3, ntt, ntt_builtin
+
+
+def benchmark_ntt(digit_sizes):
+    """([int]) -> None
+    Times ntt_limbs on random numbers with each number of digits, and fits
+    the growth exponent (quasi-linear should come out a little above 1).
+    """
+    print("NTT Multiplication Benchmark:")
+    times = []
+    for num_digits in digit_sizes:
+        x = random.getrandbits(int(num_digits * 3.33))
+        y = random.getrandbits(int(num_digits * 3.33))
+        x_limbs, y_limbs = int_to_limbs(x), int_to_limbs(y)
+        times += [_best_time(ntt_limbs, (x_limbs, y_limbs), 1)]
+        print("\t{n} digits: {time:.4f}s".format(n=num_digits, time=times[-1]))
+    print("\tGrowth exponent: {exp:.2f}".format(
+        exp=fit_growth_exponent(digit_sizes, times)))
+
+def benchmark_multipliers(digit_sizes):
+    """([int]) -> None
+    Times multiply_limbs against Python's built-in int multiplication on
+    random numbers with each number of digits (conversions not included).
+    """
+    print("Limb Multiplication Benchmark:")
+    for num_digits in digit_sizes:
+        x, y = (int(num) for num in generate_number_pair(num_digits))
+        x_limbs, y_limbs = int_to_limbs(x), int_to_limbs(y)
+
+        start = time.perf_counter()
+        multiply_limbs(x_limbs, y_limbs)
+        limb_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        x * y
+        builtin_time = time.perf_counter() - start
+
+        print("\t{n} digits: limbs {limb:.6f}s, built-in {builtin:.6f}s".format(
+            n=num_digits, limb=limb_time, builtin=builtin_time))
+
+
+def benchmark_decimal_conversion(digit_sizes):
+    """([int]) -> None
+    Times decimal_to_int and int_to_decimal against the built-in int(str)
+    and str(int) (with CPython's limit on their length lifted).
+    """
+    print("Decimal Conversion Benchmark:")
+    set_limit = getattr(sys, "set_int_max_str_digits", lambda limit: None)
+    set_limit(0)
+    try:
+        for num_digits in digit_sizes:
+            digits = generate_number_pair(num_digits)[0]
+            x = int(digits)
+            print("\t{n} digits: to int {ours:.4f}s (built-in {builtin:.4f}s), "
+                  "to str {ours_str:.4f}s (built-in {builtin_str:.4f}s)".format(
+                      n=num_digits,
+                      ours=_best_time(decimal_to_int, (digits,), 1),
+                      builtin=_best_time(int, (digits,), 1),
+                      ours_str=_best_time(int_to_decimal, (x,), 1),
+                      builtin_str=_best_time(str, (x,), 1)))
+    finally:
+        set_limit(sys.int_info.default_max_str_digits
+                  if hasattr(sys.int_info, "default_max_str_digits") else 0)
+
+
+def generate_number_pair(num_digits):
+    """(int) -> (str, str)
+    Generate two random numbers with num_digits digits each.
+    """
     num1, num2 = str(random.randint(1, 9)), str(random.randint(1, 9))
 
-    for i in range(desired_length - 1):
+    for i in range(num_digits - 1):
         num1 += str(random.randint(0, 9))
         num2 += str(random.randint(0, 9))
 
     return (num1, num2)
 
 
+def generate_valid_number_pair():
+    return generate_number_pair(2 ** random.randint(1, 3))
+
+
+def generate_arbitrary_number_pair():
+    """
+    Two random (possibly negative) numbers of unrelated lengths, long enough
+    to reach past KARATSUBA_THRESHOLD.
+    """
+    num1, num2 = generate_number_pair(random.randint(1, 1500))
+    num2 = num2[:random.randint(1, len(num2))]
+    if random.randint(0, 3) == 0:
+        num1 = "-" + num1
+    return (num1, num2)
+
+
+def generate_long_decimal():
+    """
+    A random (possibly negative) decimal string long enough for a few levels
+    of the conversions.
+    """
+    digits = generate_number_pair(random.randint(1, 20000))[0]
+    if random.randint(0, 3) == 0:
+        digits = "-" + digits
+    return (digits,)
+
+
+def generate_parallel_limb_pair():
+    """
+    Two random limb lists of unrelated lengths, long enough to be split
+    among the processes.
+    """
+    return tuple(int_to_limbs(random.getrandbits(LIMB_BITS * random.randint(
+        PARALLEL_MULTIPLY_THRESHOLD, 4 * PARALLEL_MULTIPLY_THRESHOLD)))
+        for i in range(2))
+
+
+def generate_division_pair():
+    """
+    A random (possibly negative) dividend and divisor, the divisor long
+    enough for Newton's iteration and the dividend up to 5 times as long.
+    """
+    b = random.getrandbits(random.randint(DIVISION_THRESHOLD,
+                                          2 * DIVISION_THRESHOLD)) | 1
+    a = random.getrandbits(random.randint(1, 5 * b.bit_length()))
+    return (a * random.choice([1, -1]), b * random.choice([1, -1]))
+
+
+def generate_polynomial_batch():
+    """
+    Two batches of random polynomials (integer or float) of unrelated
+    lengths, the second possibly without a batch axis (broadcast).
+    """
+    batch_size = random.randint(1, 20)
+    n, m = random.randint(1, 300), random.randint(1, 300)
+    if random.randint(0, 1) == 0:
+        P = np.random.randint(-1000, 1000, size=(batch_size, n))
+        Q = np.random.randint(-1000, 1000, size=(batch_size, m))
+    else:
+        P = np.random.uniform(-1, 1, size=(batch_size, n))
+        Q = np.random.uniform(-1, 1, size=(batch_size, m))
+    if random.randint(0, 3) == 0:
+        Q = Q[0]
+    return (P, Q)
+
+
+def convolve_each(P, Q):
+    """(np.ndarray, np.ndarray) -> np.ndarray
+    np.convolve on each pair in the batch.
+    """
+    Q = np.broadcast_to(Q, (P.shape[0], Q.shape[-1]))
+    return np.array([np.convolve(p, q) for p, q in zip(P, Q)])
+
+
+def streamed_round_trip(digits):
+    """(str) -> str"""
+    out = io.StringIO()
+    write_decimal(decimal_to_int(digits), out)
+    return out.getvalue()
+
+
 if __name__ == '__main__':
 
     # Testing Multiplication
@@ -265,4 +1518,95 @@ if __name__ == '__main__':
                          input_generator=generate_valid_number_pair)
     mult_tester.add_function("Naive Div Conq Multiplication", div_conq_multiplication)
     mult_tester.add_function("Karatsuba's Div Conq Multiplication", karatsuba_div_conq)
-    mult_tester.test_all_functions()
\ No newline at end of file
+    mult_tester.test_all_functions()
+
+    limb_tester = Tester(name="Limb Multiplication Tester",
+                         num_tests=200,
+                         baseline=string_multiplication,
+                         input_generator=generate_arbitrary_number_pair)
+    limb_tester.add_function("Limb Multiplication (by size)",
+                             limb_multiplication)
+    limb_tester.add_function("Limb Schoolbook Multiplication",
+                             lambda A, B: limb_multiplication(
+                                 A, B, schoolbook_limbs))
+    limb_tester.add_function("Limb Karatsuba Multiplication",
+                             lambda A, B: limb_multiplication(
+                                 A, B, karatsuba_limbs))
+    limb_tester.add_function("Limb Toom-3 Multiplication",
+                             lambda A, B: limb_multiplication(
+                                 A, B, toom3_limbs))
+    if np is not None:
+        limb_tester.add_function("Limb NTT Multiplication",
+                                 lambda A, B: limb_multiplication(
+                                     A, B, ntt_limbs))
+    limb_tester.test_all_functions(shared_inputs=True)
+
+    print("Calibrated thresholds (Karatsuba, Toom-3, NTT, NTT over built-in): "
+          "{thresholds}".format(
+              thresholds=calibrate_multiplication_thresholds()))
+    if np is not None:
+        benchmark_ntt(geometric_sizes(2 ** 14, 2 ** 20, factor=4))
+
+    conversion_tester = Tester(name="Decimal Conversion Tester",
+                               num_tests=100,
+                               baseline=lambda digits: digits,
+                               input_generator=generate_long_decimal)
+    conversion_tester.add_function("Round Trip",
+                                   lambda digits: int_to_decimal(
+                                       decimal_to_int(digits)))
+    conversion_tester.add_function("Streamed Round Trip", streamed_round_trip)
+    conversion_tester.test_all_functions(shared_inputs=True)
+    division_tester = Tester(name="Newton Division Tester",
+                             num_tests=30,
+                             baseline=divmod,
+                             input_generator=generate_division_pair)
+    division_tester.add_function("Newton divmod", newton_divmod)
+    division_tester.test_all_functions(shared_inputs=True)
+    benchmark_division(geometric_sizes(2 ** 16, 2 ** 20, factor=4))
+    benchmark_decimal_conversion(geometric_sizes(2 ** 12, 2 ** 18, factor=4))
+
+    if np is not None:
+        polynomial_tester = Tester(name="Polynomial Multiplication Tester",
+                                   num_tests=200,
+                                   baseline=convolve_each,
+                                   input_generator=generate_polynomial_batch,
+                                   equivalence_fxn=lambda x, y: (
+                                       (x.shape == y.shape) and
+                                       np.allclose(x, y)))
+        for method in POLYNOMIAL_MULTIPLIERS:
+            polynomial_tester.add_function(
+                "Polynomial Multiplication ({method})".format(method=method),
+                lambda P, Q, method=method: polynomial_multiply(P, Q, method))
+        polynomial_tester.add_function("Polynomial Multiplication (by size)",
+                                       polynomial_multiply)
+        polynomial_tester.test_all_functions(shared_inputs=True)
+        benchmark_polynomial_multiply(
+            geometric_sizes(2 ** 4, 2 ** 10, factor=4))
+
+    # The operands are past the length CPython will convert to decimal
+    parallel_tester = Tester(name="Parallel Multiplication Tester",
+                             num_tests=10,
+                             baseline=multiply_limbs,
+                             input_generator=generate_parallel_limb_pair)
+    for processes in (2, 4):
+        parallel_tester.add_function(
+            "Parallel Multiplication ({p} processes)".format(p=processes),
+            lambda A, B, processes=processes: parallel_multiply_limbs(
+                A, B, processes))
+    parallel_tester.test_all_functions(shared_inputs=True)
+    benchmark_parallel_multiplication(
+        2 ** 20, geometric_sizes(1, max(4, multiprocessing.cpu_count())))
+
+    benchmark_multipliers(geometric_sizes(2 ** 6, 2 ** 12))
+
+    # Checking the cost analyses: the sizes have to be powers of 2
+    mult_tester.benchmark(
+        sized_generator=generate_number_pair,
+        sizes=geometric_sizes(2 ** 3, 2 ** 8),
+        recurrences={"Naive Div Conq Multiplication": Recurrence(4, 2, 1),
+                     "Karatsuba's Div Conq Multiplication": Recurrence(3, 2, 1)})
+
+    # The base cases are where the single-digit multiplications happen
+    mult_tester.count_operations(
+        sized_generator=generate_number_pair,
+        sizes=geometric_sizes(2 ** 1, 2 ** 6))
@@ -1,6 +1,16 @@
+import multiprocessing
 import random
+import time
+from collections import OrderedDict
+from functools import lru_cache
 
-from Programming.Testing import Tester
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+from Programming.Testing import OperationCounter
+from Programming.Testing.Tester import Tester, geometric_sizes
 
 '''
 Problem: Modular Exponentiation
@@ -45,6 +55,7 @@ Important Notes:
 			fewer computations.
 '''
 
+@OperationCounter.probe("mod")
 def mod(a, b):
 	'''(int, int) -> int
 	Modulo function to emulate my notation given above.
@@ -479,11 +490,907 @@ def smarter_loop_modular_exp(a, b, m):
 		exponent //= 2
 	return result
 
+'''
+Reduction Contexts - Montgomery and Barrett
+
+smarter_loop_modular_exp does a general mod (a division) after every
+multiplication. When many exponentiations share a modulus, the work that only
+depends on m can be done once, so that every reduction after that is just
+multiplications, masks and shifts. Let k be the number of bits of m.
+
+Montgomery (m odd): pick R = 2 ** k > m, which is coprime to m. Keep every
+number x as xR mod m ("Montgomery form"). The product of two such numbers is
+xyR^2, and REDC(T) = T * R^-1 mod m (for T < mR) only needs T mod R and a
+shift by k:
+	u = ((T mod R) * m') mod R, where m' = -m^-1 mod R
+	T + u * m is divisible by R, and (T + u * m) / R < 2m
+So REDC(xR * yR) = xyR mod m, after at most one subtraction.
+
+Barrett (any m, used for even m): precompute mu = floor(4 ** k / m). Then
+for x < m ** 2,
+	q = ((x >> (k - 1)) * mu) >> (k + 1)
+is at most 2 below floor(x / m), so x - q * m is off from mod(x, m) by at
+most two subtractions of m.
+
+Either way the number of reductions is the same as smarter_loop_modular_exp's
+number of mods, O(log b); only what a reduction costs changes. In Python the
+built-in % is a (quadratic) division written in C, and pow does all of this
+in C, so the contexts are mostly here to show how the reductions work: in
+the benchmark below they lose to pow and even to smarter_loop_modular_exp up
+to a few thousand bits. Only past about MODULUS_CONTEXT_MIN_BITS bits (with
+short exponents, measured on one machine) does the built-in subquadratic
+multiplication let a cached context beat pow, so context_modular_exp calls
+pow for anything smaller, and modulus_context_exp always uses the context.
+'''
+MODULUS_CONTEXT_CACHE_SIZE = 32
+MODULUS_CONTEXT_MIN_BITS = 2 ** 15
+
+class ModulusContext():
+	"""
+	Precomputed reduction parameters for one modulus m: Montgomery's if m is
+	odd, Barrett's otherwise. A teaching implementation: below
+	MODULUS_CONTEXT_MIN_BITS bits it is slower than pow.
+	"""
+
+	def __init__(self, m):
+		"""(ModulusContext, int) -> None"""
+		if m < 1:
+			raise ValueError("Modulus must be positive, got {m}".format(m=m))
+		self.m = m
+		self.k = m.bit_length()
+		self.montgomery = (m % 2 == 1) and (m > 1)
+		if self.montgomery:
+			self.r_mask = (1 << self.k) - 1
+			self.m_prime = (-pow(m, -1, 1 << self.k)) & self.r_mask
+			self.r_squared = (1 << (2 * self.k)) % m
+		else:
+			self.mu = (1 << (2 * self.k)) // m
+
+	@OperationCounter.probe("mod")
+	def redc(self, T):
+		"""(ModulusContext, int) -> int
+		T * R^-1 mod m, for 0 <= T < mR (Montgomery only).
+		"""
+		u = ((T & self.r_mask) * self.m_prime) & self.r_mask
+		t = (T + u * self.m) >> self.k
+		return t - self.m if t >= self.m else t
+
+	@OperationCounter.probe("mod")
+	def barrett_reduce(self, x):
+		"""(ModulusContext, int) -> int
+		x mod m, for 0 <= x < m ** 2 (Barrett only).
+		"""
+		q = ((x >> (self.k - 1)) * self.mu) >> (self.k + 1)
+		r = x - q * self.m
+		while r >= self.m:
+			r -= self.m
+		return r
+
+	def exp(self, a, b):
+		"""(ModulusContext, int, int) -> int
+		mod(a ** b, m), by repeated squaring inside the context.
+		"""
+		if self.m == 1:
+			return 0
+		if self.montgomery:
+			reduce = self.redc
+			result = self.redc(self.r_squared)
+			base = self.redc((a % self.m) * self.r_squared)
+		else:
+			reduce = self.barrett_reduce
+			result = 1
+			base = a % self.m
+
+		exponent = b
+		while exponent > 0:
+			if (exponent % 2 == 1):
+				result = reduce(result * base)
+			base = reduce(base * base)
+			exponent //= 2
+		return self.redc(result) if self.montgomery else result
+
+@lru_cache(maxsize=MODULUS_CONTEXT_CACHE_SIZE)
+def modulus_context(m):
+	"""(int) -> ModulusContext
+	The (cached) context of the modulus m.
+	"""
+	return ModulusContext(m)
+
+def modulus_context_exp(a, b, m):
+	"""(int, int, int) -> int
+	mod(a ** b, m) in the cached reduction context of m, whatever its size.
+	"""
+	return modulus_context(m).exp(a, b)
+
+def context_modular_exp(a, b, m):
+	"""(int, int, int) -> int
+	mod(a ** b, m) in the cached reduction context of m when m has at least
+	MODULUS_CONTEXT_MIN_BITS bits, and with pow (which is faster) otherwise.
+	"""
+	if m.bit_length() < MODULUS_CONTEXT_MIN_BITS:
+		return pow(a, b, m)
+	return modulus_context_exp(a, b, m)
+
+'''
+Sliding Windows
+
+smarter_loop_modular_exp does one squaring per bit of b, and one more
+multiplication for every 1 bit (about half of them). Instead, precompute the
+odd powers a, a^3, ..., a^(2^k - 1) (2^(k - 1) multiplications), and read b
+from the top in windows of up to k bits that start and end with a 1: each
+window costs its squarings plus a single multiplication by a table entry.
+	log b squarings + about (log b) / (k + 1) multiplications + 2^(k - 1)
+A bigger window saves multiplications but costs a bigger table, so k grows
+with the length of b (the cut-offs are the usual ones from OpenSSL).
+
+Fixed-Base Comb (Lim-Lee)
+
+When the same a and m come back again and again (a generator, a public
+key), even the squarings can be precomputed. Cut b's t bits into h rows of
+w = ceil(t / h) bits and stack the rows like the teeth of a comb:
+	b = sum over rows i of (row_i) * 2^(i * w)
+For every set S of rows, precompute G[S] = product over i in S of
+a^(2^(i * w)). Then a^b only needs w squarings: go through the w columns from
+the top, squaring, and multiply by G[the rows with a 1 in that column].
+	w squarings + w multiplications, with 2^h table entries
+The tables are kept in an LRU cache keyed by (a, m) of COMB_CACHE_SIZE
+entries; a table for too few bits of b is rebuilt bigger.
+'''
+COMB_TEETH = 8
+COMB_CACHE_SIZE = 16
+
+def window_size(exponent_bits):
+	"""(int) -> int
+	Sliding window size for an exponent with this many bits.
+	"""
+	for bits, size in ((671, 6), (239, 5), (79, 4), (23, 3)):
+		if exponent_bits > bits:
+			return size
+	return 1
+
+def _sliding_windows(a, b, m):
+	"""(int, int, int) -> {int: int}
+	The sliding windows of b (at most window_size(bits of b) bits, ending with
+	1 bits), as {position of the window's lowest bit: mod(a ** window, m)}.
+	"""
+	# odd_powers[i] = mod(a ** (2 * i + 1), m)
+	k = window_size(b.bit_length())
+	odd_powers = [mod(a, m)]
+	if k > 1:
+		square = mod(odd_powers[0] * odd_powers[0], m)
+		for i in range(2 ** (k - 1) - 1):
+			odd_powers += [mod(odd_powers[-1] * square, m)]
+
+	multiplications = {}
+	i = b.bit_length() - 1
+	while i >= 0:
+		if (b >> i) & 1 == 0:
+			i -= 1
+			continue
+		# Longest window b[i:j] (at most k bits) that ends in a 1
+		j = max(i - k + 1, 0)
+		while (b >> j) & 1 == 0:
+			j += 1
+		window = (b >> j) & ((1 << (i - j + 1)) - 1)
+		multiplications[j] = odd_powers[window // 2]
+		i = j - 1
+	return multiplications
+
+def sliding_window_modular_exp(a, b, m):
+	"""(int, int, int) -> int
+	mod(a ** b, m) by sliding windows of size window_size(bits of b).
+	"""
+	if m == 1:
+		return 0
+	if b == 0:
+		return 1
+
+	multiplications = _sliding_windows(a, b, m)
+	result = 1
+	for i in range(b.bit_length() - 1, -1, -1):
+		result = mod(result * result, m)
+		if i in multiplications:
+			result = mod(result * multiplications[i], m)
+	return result
+
+class FixedBaseComb():
+	"""
+	Lim-Lee comb table for exponentiating one base a modulo m, for exponents
+	of up to exponent_bits bits.
+	"""
+
+	def __init__(self, a, m, exponent_bits, teeth=COMB_TEETH):
+		"""(FixedBaseComb, int, int, int, int) -> None"""
+		if m < 1:
+			raise ValueError("Modulus must be positive, got {m}".format(m=m))
+		self.m = m
+		self.teeth = teeth
+		self.width = max(1, -(-exponent_bits // teeth))
+		self.exponent_bits = self.width * teeth
+
+		# tooth_powers[i] = mod(a ** (2 ** (i * width)), m)
+		tooth_powers = [mod(a, m)]
+		for i in range(teeth - 1):
+			power = tooth_powers[-1]
+			for j in range(self.width):
+				power = mod(power * power, m)
+			tooth_powers += [power]
+
+		# table[S] = product of tooth_powers[i] for the bits i of S, built
+		# from the table without S's top bit
+		self.table = [1 % m]
+		for i, power in enumerate(tooth_powers):
+			self.table += [mod(entry * power, m) for entry in self.table]
+
+	def exp(self, b):
+		"""(FixedBaseComb, int) -> int
+		mod(a ** b, m), for b with at most exponent_bits bits.
+		"""
+		if b.bit_length() > self.exponent_bits:
+			raise ValueError("Exponent has {bits} bits, the table only covers "
+							 "{max}".format(bits=b.bit_length(),
+											max=self.exponent_bits))
+		rows = [(b >> (i * self.width)) & ((1 << self.width) - 1)
+				for i in range(self.teeth)]
+		result = 1 % self.m
+		for column in range(self.width - 1, -1, -1):
+			result = mod(result * result, self.m)
+			index = 0
+			for i, row in enumerate(rows):
+				index |= ((row >> column) & 1) << i
+			if index:
+				result = mod(result * self.table[index], self.m)
+		return result
+
+_comb_cache = OrderedDict()
+
+def fixed_base_comb(a, m, exponent_bits):
+	"""(int, int, int) -> FixedBaseComb
+	The cached comb table of a modulo m, (re)built if it is missing or too
+	small for exponent_bits. Least recently used tables are dropped past
+	COMB_CACHE_SIZE of them.
+	"""
+	key = (a, m)
+	comb = _comb_cache.get(key)
+	if (comb is None) or (comb.exponent_bits < exponent_bits):
+		comb = FixedBaseComb(a, m, exponent_bits)
+		_comb_cache[key] = comb
+	_comb_cache.move_to_end(key)
+	while len(_comb_cache) > COMB_CACHE_SIZE:
+		_comb_cache.popitem(last=False)
+	return comb
+
+def fixed_base_modular_exp(a, b, m):
+	"""(int, int, int) -> int
+	mod(a ** b, m) with the cached comb table of a modulo m.
+	"""
+	return fixed_base_comb(a, m, b.bit_length()).exp(b)
+
+def benchmark_precomputed_exp(exponent_bit_sizes, modulus_bits=2048):
+	'''([int], int) -> None
+
+	Counts the multiplications (mods) and times smarter_loop_modular_exp,
+	sliding_window_modular_exp and fixed_base_modular_exp with a fixed base
+	and modulus, for exponents with each number of bits. The comb table is
+	built (and counted) separately, before the exponentiation.
+	'''
+	print("Precomputed Exponentiation Benchmark ({bits}-bit m):".format(
+		bits=modulus_bits))
+	m = random.getrandbits(modulus_bits) | (1 << (modulus_bits - 1)) | 1
+	a = random.randint(2, m - 1)
+	for bits in exponent_bit_sizes:
+		b = random.getrandbits(bits) | (1 << (bits - 1))
+		with OperationCounter.counting() as counts:
+			fixed_base_comb(a, m, bits)
+		table_mods = counts["mod"]
+
+		results = []
+		for name, fxn in [("smarter loop", smarter_loop_modular_exp),
+						  ("sliding window", sliding_window_modular_exp),
+						  ("fixed-base comb", fixed_base_modular_exp)]:
+			with OperationCounter.counting() as counts:
+				fxn(a, b, m)
+			results += ["{name} {mods} mods {time:.5f}s".format(
+				name=name, mods=counts["mod"],
+				time=_best_time(fxn, (a, b, m), 3))]
+		print("\t{bits}-bit b: ".format(bits=bits) + ", ".join(results) +
+			  " (comb table: {mods} mods)".format(mods=table_mods))
+
+'''
+Multi-Exponentiation (Shamir / Straus)
+
+mod(a_1 ** b_1 * ... * a_k ** b_k, m) term by term costs k squaring chains.
+But squaring the running product squares every term at once, so one chain
+of (bits of the longest b) squarings is enough for all of them:
+
+Shamir's trick (few terms): precompute the product of every subset of the
+bases (2^k - 1 entries). At each bit, square, then multiply by the entry
+for the set of terms whose exponent has that bit set.
+	log b squarings + log b multiplications + 2^k
+
+Interleaved windows (many terms): a 2^k table is too big, so give each term
+its own sliding-window table of odd powers (see sliding_window_modular_exp)
+and its own windows. Still one squaring chain; at each bit, multiply by the
+table entry of every term with a window ending at that bit.
+	log b squarings + about k (log b) / (w + 1) multiplications + tables
+'''
+SHAMIR_MAX_TERMS = 4
+
+def separate_multi_modular_exp(bases, exponents, m):
+	"""([int], [int], int) -> int
+	mod(product of a ** b, m), one smarter_loop_modular_exp per term.
+	"""
+	result = 1 % m
+	for a, b in zip(bases, exponents):
+		result = mod(result * smarter_loop_modular_exp(a, b, m), m)
+	return result
+
+def multi_modular_exp(bases, exponents, m):
+	"""([int], [int], int) -> int
+	mod(product of a ** b, m) for the pairs of bases and exponents, with a
+	single squaring chain.
+	"""
+	if len(bases) != len(exponents):
+		raise ValueError("Got {a} bases but {b} exponents".format(
+			a=len(bases), b=len(exponents)))
+	if m == 1:
+		return 0
+	bits = max([b.bit_length() for b in exponents], default=0)
+	result = 1
+
+	if len(bases) <= SHAMIR_MAX_TERMS:
+		# subset_products[S] = product of the bases in the set S (as bits)
+		subset_products = [1]
+		for a in bases:
+			a = mod(a, m)
+			subset_products += [mod(entry * a, m)
+								for entry in subset_products]
+		for i in range(bits - 1, -1, -1):
+			result = mod(result * result, m)
+			subset = 0
+			for t, b in enumerate(exponents):
+				subset |= ((b >> i) & 1) << t
+			if subset:
+				result = mod(result * subset_products[subset], m)
+		return result
+
+	# Every term's (bit -> odd power) of its windows
+	multiplications = [[] for i in range(bits)]
+	for a, b in zip(bases, exponents):
+		if b == 0:
+			continue
+		for position, power in _sliding_windows(a, b, m).items():
+			multiplications[position] += [power]
+
+	for i in range(bits - 1, -1, -1):
+		result = mod(result * result, m)
+		for power in multiplications[i]:
+			result = mod(result * power, m)
+	return result
+
+def benchmark_multi_exp(term_counts, bits=256):
+	'''([int], int) -> None
+	Counts the multiplications (mods) of separate_multi_modular_exp and
+	multi_modular_exp, with that many terms of bits-bit numbers.
+	'''
+	print("Multi-Exponentiation Benchmark ({bits}-bit numbers):".format(
+		bits=bits))
+	m = random.getrandbits(bits) | (1 << (bits - 1))
+	for k in term_counts:
+		bases = [random.getrandbits(bits) for i in range(k)]
+		exponents = [random.getrandbits(bits) for i in range(k)]
+		results = []
+		for name, fxn in [("separate", separate_multi_modular_exp),
+						  ("simultaneous", multi_modular_exp)]:
+			with OperationCounter.counting() as counts:
+				fxn(bases, exponents, m)
+			results += ["{name} {mods} mods {time:.5f}s".format(
+				name=name, mods=counts["mod"],
+				time=_best_time(fxn, (bases, exponents, m), 3))]
+		print("\t{k} terms: ".format(k=k) + ", ".join(results))
+
+'''
+CRT Exponentiation
+
+If m = q_1 * q_2 * ... with the q_i = p_i ** e_i powers of distinct primes,
+the Chinese Remainder Theorem says a number mod m is the same thing as its
+remainders mod every q_i. So compute r_i = mod(a ** b, q_i) and recombine:
+	x = sum of r_i * M_i * (M_i^-1 mod q_i), mod m, where M_i = m / q_i
+A multiplication mod q_i costs about (1 / k)^2 of one mod m (k factors,
+schoolbook), and the exponent shrinks too:
+	If p does not divide a, a ** lambda(q) = 1 mod q (Carmichael's lambda:
+	p ** (e - 1) * (p - 1) for odd p; 1, 2, 2 ** (e - 2) for 2, 4, 8...),
+	so b can be reduced mod lambda(q), to about as many bits as q.
+	If p divides a, a ** b is divisible by p ** b, so it is 0 mod q once
+	b >= e (and b < e is a tiny exponent anyway).
+The factors are independent, so they can also be spread over a pool.
+'''
+def carmichael_lambda(p, e):
+	"""(int, int) -> int
+	Carmichael's lambda of the prime power p ** e.
+	"""
+	if p == 2 and e >= 3:
+		return 2 ** (e - 2)
+	return (p ** (e - 1)) * (p - 1)
+
+def _prime_power_exp(task):
+	"""((int, int, int, int)) -> int
+	mod(a ** b, p ** e), for a prime p.
+	"""
+	a, b, p, e = task
+	q = p ** e
+	if a % p == 0:
+		return 0 if b >= e else mod(a ** b, q)
+	return sliding_window_modular_exp(a, b % carmichael_lambda(p, e), q)
+
+@lru_cache(maxsize=MODULUS_CONTEXT_CACHE_SIZE)
+def _crt_coefficients(prime_powers):
+	"""((int)) -> [int]
+	M_i * (M_i^-1 mod q_i) for the pairwise coprime moduli q_i.
+	"""
+	m = 1
+	for q in prime_powers:
+		m *= q
+	return [(m // q) * pow(m // q, -1, q) for q in prime_powers]
+
+def crt_modular_exp(a, b, m, factorisation=None, pool=None):
+	"""(int, int, int, {int: int}, multiprocessing.Pool) -> int
+
+	mod(a ** b, m). If the factorisation of m is given, as {prime: power}
+	(the primes are trusted, their product is checked), the exponentiation
+	is done mod every prime power and recombined with the CRT, on pool if
+	one is given.
+	"""
+	if factorisation is None:
+		return sliding_window_modular_exp(a, b, m)
+	factors = sorted(factorisation.items())
+	product = 1
+	for p, e in factors:
+		product *= p ** e
+	if product != m:
+		raise ValueError("Factorisation {f} has product {product}, not "
+						 "{m}".format(f=factorisation, product=product, m=m))
+	if m == 1:
+		return 0
+
+	tasks = [(a, b, p, e) for p, e in factors]
+	if pool is None:
+		residues = [_prime_power_exp(task) for task in tasks]
+	else:
+		residues = pool.map(_prime_power_exp, tasks)
+	coefficients = _crt_coefficients(tuple(p ** e for p, e in factors))
+	return sum(r * c for r, c in zip(residues, coefficients)) % m
+
+def benchmark_crt_exp(factorisation, num_exps=20, processes=None):
+	'''({int: int}, int, int) -> None
+
+	Throughput (exponentiations per second) of pow, smarter_loop_modular_exp,
+	context_modular_exp and crt_modular_exp (without and with a pool of
+	processes) for random full-size bases and exponents mod the product of
+	the factorisation.
+	'''
+	m = 1
+	for p, e in factorisation.items():
+		m *= p ** e
+	print("CRT Exponentiation Benchmark ({bits}-bit m, {k} factors):".format(
+		bits=m.bit_length(), k=len(factorisation)))
+	triples = [(random.randint(2, m - 1), random.getrandbits(m.bit_length()), m)
+			   for i in range(num_exps)]
+
+	fxns = [("pow", pow),
+			("smarter loop", smarter_loop_modular_exp),
+			("context", context_modular_exp),
+			("CRT", lambda a, b, m: crt_modular_exp(a, b, m, factorisation))]
+	with multiprocessing.Pool(processes) as pool:
+		fxns += [("CRT with pool", lambda a, b, m: crt_modular_exp(
+			a, b, m, factorisation, pool))]
+		for name, fxn in fxns:
+			elapsed = _best_time(lambda: [fxn(*t) for t in triples], (), 1)
+			print("\t{name}: {rate:.1f} exponentiations / s".format(
+				name=name, rate=num_exps / elapsed))
+
+'''
+Primality Testing (Miller-Rabin)
+
+Write n - 1 = d * 2^s with d odd. If n is prime, Z_n is a field, so the only
+square roots of 1 are +-1, and (Fermat) a^(n - 1) = 1; so the sequence
+	a^d, a^(2d), a^(4d), ..., a^(2^s d) = a^(n - 1)
+either starts at 1 or hits -1 somewhere. A base a where it doesn't proves n
+composite. Each base is one exponentiation plus s squarings.
+With every prime base up to 41 the test is exact for n < 3.3 * 10^24.
+Fixed bases can't give a probability beyond that (some composites pass all
+of them), so bigger n get the same number of bases picked at random: a
+composite passes each random base with probability at most 1/4, so it
+passes all 13 with probability at most 4^-13.
+
+Most candidates have a small factor, so trial division by the (cached)
+primes below SMALL_PRIMES_LIMIT throws them out before any exponentiation.
+A batch of candidates is independent work, so it can go to a pool.
+
+Batch Inversion (Montgomery's trick)
+
+To invert a_1, ..., a_n mod m, invert only their product. With the prefix
+products c_i = a_1 * ... * a_i,
+	c_n^-1 * c_(n - 1) = a_n^-1, and c_n^-1 * a_n = c_(n - 1)^-1
+so walking back down gives every inverse: one inversion (Fermat's
+a^(m - 2) when m is prime, the extended Euclidean algorithm otherwise) plus
+3(n - 1) multiplications.
+'''
+SMALL_PRIMES_LIMIT = 1000
+MILLER_RABIN_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+MILLER_RABIN_EXACT_LIMIT = 3317044064679887385961981
+_random_bases = random.SystemRandom()
+
+@lru_cache(maxsize=None)
+def small_primes(limit=SMALL_PRIMES_LIMIT):
+	"""(int) -> (int)
+	The primes below limit (sieve of Eratosthenes).
+	"""
+	is_prime = [True] * limit
+	for i in range(2, int(limit ** 0.5) + 1):
+		if is_prime[i]:
+			for j in range(i * i, limit, i):
+				is_prime[j] = False
+	return tuple(i for i in range(2, limit) if is_prime[i])
+
+def is_probable_prime(n):
+	"""(int) -> bool
+	Trial division, then Miller-Rabin with the bases MILLER_RABIN_BASES
+	(exact below MILLER_RABIN_EXACT_LIMIT). Above it, the bases are random and
+	a composite is reported prime with probability at most 4^-13.
+	"""
+	if n < 2:
+		return False
+	for p in small_primes():
+		if n % p == 0:
+			return n == p
+	if n < SMALL_PRIMES_LIMIT ** 2:
+		return True
+
+	d, s = n - 1, 0
+	while d % 2 == 0:
+		d //= 2
+		s += 1
+	if n < MILLER_RABIN_EXACT_LIMIT:
+		bases = MILLER_RABIN_BASES
+	else:
+		bases = [_random_bases.randrange(2, n - 1)
+				 for i in range(len(MILLER_RABIN_BASES))]
+	for a in bases:
+		x = sliding_window_modular_exp(a, d, n)
+		if x == 1 or x == n - 1:
+			continue
+		for i in range(s - 1):
+			x = mod(x * x, n)
+			if x == n - 1:
+				break
+		else:
+			return False
+	return True
+
+def batch_is_prime(candidates, processes=None):
+	"""([int], int) -> [bool]
+	is_probable_prime of every candidate, over that many processes if
+	processes is given.
+	"""
+	if processes is None:
+		return [is_probable_prime(n) for n in candidates]
+	with multiprocessing.Pool(processes) as pool:
+		return pool.map(is_probable_prime, candidates,
+						chunksize=max(1, len(candidates) // (4 * processes)))
+
+def extended_gcd(a, b):
+	"""(int, int) -> (int, int, int)
+	(g, x, y) with g = gcd(a, b) = a * x + b * y.
+	"""
+	x0, y0, x1, y1 = 1, 0, 0, 1
+	while b:
+		q = a // b
+		a, b = b, a - q * b
+		x0, x1 = x1, x0 - q * x1
+		y0, y1 = y1, y0 - q * y1
+	return (a, x0, y0)
+
+def modular_inverse(a, m, m_is_prime=False):
+	"""(int, int, bool) -> int
+	a^-1 mod m, by Fermat if m is known to be prime, extended Euclid
+	otherwise. Raises ValueError if a isn't invertible.
+	"""
+	if m_is_prime and a % m != 0:
+		return sliding_window_modular_exp(a, m - 2, m)
+	g, x, y = extended_gcd(a % m, m)
+	if g != 1:
+		raise ValueError("{a} is not invertible mod {m}".format(a=a, m=m))
+	return x % m
+
+def batch_modular_inverse(values, m, m_is_prime=None):
+	"""([int], int, bool) -> [int]
+
+	The inverses mod m of all the values, by Montgomery's trick. Whether m is
+	prime is tested if it isn't given. Raises ValueError naming the first
+	value that isn't invertible.
+	"""
+	if m < 2:
+		raise ValueError("Modulus must be at least 2, got {m}".format(m=m))
+	if not values:
+		return []
+	if m_is_prime is None:
+		m_is_prime = is_probable_prime(m)
+
+	# prefixes[i] = mod(values[0] * ... * values[i], m)
+	prefixes = [mod(values[0], m)]
+	for a in values[1:]:
+		prefixes += [mod(prefixes[-1] * a, m)]
+	try:
+		inverse = modular_inverse(prefixes[-1], m, m_is_prime)
+	except ValueError:
+		for a in values:
+			if extended_gcd(a % m, m)[0] != 1:
+				raise ValueError("{a} is not invertible mod {m}".format(
+					a=a, m=m))
+		raise
+
+	inverses = [0] * len(values)
+	for i in range(len(values) - 1, 0, -1):
+		inverses[i] = mod(inverse * prefixes[i - 1], m)
+		inverse = mod(inverse * values[i], m)
+	inverses[0] = inverse
+	return inverses
+
+def benchmark_batch_number_theory(num_values, bits=256, processes=None):
+	'''(int, int, int) -> None
+
+	Times batch_is_prime (with and without a pool) on num_values random odd
+	bits-bit candidates, and counts the multiplications (mods) of
+	batch_modular_inverse against one modular_inverse (by Fermat) per value
+	modulo a bits-bit prime.
+	'''
+	print("Batch Number Theory Benchmark ({n} {bits}-bit values):".format(
+		n=num_values, bits=bits))
+	candidates = [random.getrandbits(bits) | (1 << (bits - 1)) | 1
+				  for i in range(num_values)]
+	print("\tprimality: sequential {seq:.4f}s, {p} processes {par:.4f}s, "
+		  "{primes} primes".format(
+			  seq=_best_time(batch_is_prime, (candidates,), 1),
+			  p=processes,
+			  par=_best_time(batch_is_prime, (candidates, processes), 1),
+			  primes=sum(batch_is_prime(candidates))))
+
+	m = next(n for n in candidates + [2 ** 521 - 1] if is_probable_prime(n))
+	values = [random.randint(1, m - 1) for i in range(num_values)]
+	results = []
+	for name, fxn in [("one at a time",
+					   lambda: [modular_inverse(a, m, True) for a in values]),
+					  ("batch",
+					   lambda: batch_modular_inverse(values, m, True))]:
+		with OperationCounter.counting() as counts:
+			fxn()
+		results += ["{name} {mods} mods {time:.4f}s".format(
+			name=name, mods=counts["mod"], time=_best_time(fxn, (), 1))]
+	print("\tinversion: " + ", ".join(results))
+
+def _best_time(fxn, args, repeats):
+	'''(((Unknown) -> Unknown), (Unknown), int) -> float'''
+	best = float("inf")
+	for i in range(repeats):
+		start = time.perf_counter()
+		fxn(*args)
+		best = min(best, time.perf_counter() - start)
+	return best
+
+def benchmark_modular_exp(bit_sizes, exponent_bits=None, repeats=3):
+	'''([int], int, int) -> None
+
+	Times pow and the implementations above on odd and even moduli with each
+	number of bits, and a random exponent with exponent_bits bits (the same
+	as the modulus by default). looping_modular_exp is only timed
+	for exponents it can loop through (up to 16 bits), and
+	recursive_modular_exp for exponents it can recurse through (it goes as
+	deep as b has bits).
+	'''
+	print("Modular Exponentiation Benchmark:")
+	for bits in bit_sizes:
+		for parity in ("odd", "even"):
+			a = random.getrandbits(bits)
+			b_bits = exponent_bits if exponent_bits is not None else bits
+			b = random.getrandbits(b_bits) | (1 << (b_bits - 1))
+			m = random.getrandbits(bits) | (1 << (bits - 1))
+			m = (m | 1) if parity == "odd" else (m & ~1)
+			context = ModulusContext(m)
+			fxns = [("pow", pow),
+					("smarter loop", smarter_loop_modular_exp),
+					("context", modulus_context_exp),
+					("context or pow", context_modular_exp),
+					("prebuilt context", lambda a, b, m: context.exp(a, b))]
+			if b_bits <= 256:
+				fxns += [("recursive", recursive_modular_exp)]
+			if b_bits <= 16:
+				fxns += [("looping", looping_modular_exp)]
+			print("\t{bits} bits, {parity} m: ".format(bits=bits,
+													   parity=parity) +
+				  ", ".join("{name} {time:.6f}s".format(
+					  name=name, time=_best_time(fxn, (a, b, m), repeats))
+					  for name, fxn in fxns))
+
+def big_abm_generator():
+	"""
+	A random base and exponent, and a random (odd or even) modulus of up to
+	a few hundred bits.
+	"""
+	return (random.getrandbits(random.randint(1, 600)),
+			random.getrandbits(random.randint(0, 300)),
+			random.getrandbits(random.randint(1, 600)) + 1)
+
+'''
+Batch Exponentiation
+
+For millions of small (a, b, m) triples the arithmetic is nothing; the time
+goes to calling a Python function per triple. So run smarter_loop_modular_exp
+on whole NumPy arrays in lockstep: every triple squares its base each step,
+and multiplies it into its result where its exponent's current bit is 1. The
+loop runs (bits of the biggest b) times, 32 at most, for all triples at once.
+With every value below 2^32, a product of two residues is below 2^64, so
+uint64 arithmetic never overflows. The arrays are handled
+BATCH_EXP_CHUNK_SIZE triples at a time (each chunk is broadcast and converted
+to uint64 on its own) to bound the temporary arrays.
+'''
+BATCH_EXP_CHUNK_SIZE = 2 ** 16
+
+def _batch_modular_exp_chunk(a, b, m):
+	"""(np.ndarray, np.ndarray, np.ndarray) -> np.ndarray
+	mod(a ** b, m) elementwise, for uint64 arrays of 32-bit values.
+	"""
+	result = np.ones_like(a) % m
+	base = a % m
+	exponent = b.copy()
+	while exponent.any():
+		odd = (exponent & np.uint64(1)).astype(bool)
+		result = np.where(odd, result * base % m, result)
+		base = base * base % m
+		exponent >>= np.uint64(1)
+	return result
+
+def batch_modular_exp(a, b, m, chunk_size=BATCH_EXP_CHUNK_SIZE):
+	"""(array_like, array_like, array_like, int) -> np.ndarray
+
+	mod(a ** b, m) for every triple of the (broadcast) arrays a, b and m,
+	whose values must be naturals below 2^32 (and m positive).
+	"""
+	if np is None:
+		raise ImportError("batch_modular_exp needs NumPy")
+	arrays = (np.asarray(a), np.asarray(b), np.asarray(m))
+	for name, arr in zip("abm", arrays):
+		if not np.issubdtype(arr.dtype, np.integer):
+			raise ValueError("{name} must be an integer array".format(
+				name=name))
+		if arr.size and ((arr.min() < 0) or (arr.max() >= 2 ** 32)):
+			raise ValueError("{name} must be in [0, 2^32)".format(name=name))
+	if arrays[2].size and (arrays[2].min() < 1):
+		raise ValueError("m must be positive")
+
+	# Broadcasting gives views, so only each chunk is copied
+	a, b, m = np.broadcast_arrays(*arrays)
+	result = np.empty(a.size, dtype=np.uint64)
+	for start in range(0, a.size, chunk_size):
+		stop = start + chunk_size
+		result[start:stop] = _batch_modular_exp_chunk(
+			*(arr.flat[start:stop].astype(np.uint64) for arr in (a, b, m)))
+	return result.reshape(a.shape)
+
+def benchmark_batch_modular_exp(sizes):
+	'''([int]) -> None
+	Times batch_modular_exp against pow and smarter_loop_modular_exp called
+	on each triple, for random 32-bit triples.
+	'''
+	print("Batch Modular Exponentiation Benchmark:")
+	for size in sizes:
+		a, b, m = (np.random.randint(1, 2 ** 32, size=size, dtype=np.uint64)
+				   for i in range(3))
+		triples = list(zip(a.tolist(), b.tolist(), m.tolist()))
+		print("\t{n} triples: batch {batch:.4f}s, pow {pow:.4f}s, smarter "
+			  "loop {loop:.4f}s".format(
+				  n=size,
+				  batch=_best_time(batch_modular_exp, (a, b, m), 1),
+				  pow=_best_time(lambda: [pow(*t) for t in triples], (), 1),
+				  loop=_best_time(lambda: [smarter_loop_modular_exp(*t)
+										   for t in triples], (), 1)))
+
 def abm_generator():
 	return (random.randint(2, 10),
 			random.randint(1, 7),
 			random.randint(1, 35))
 
+def multi_exp_generator():
+	"""
+	Random bases and exponents (few or many terms) and a random modulus.
+	"""
+	k = random.choice([0, 1, 2, 3, 4, 5, 8, 20])
+	bits = random.randint(1, 200)
+	return ([random.getrandbits(bits) for i in range(k)],
+			[random.getrandbits(random.randint(0, bits)) for i in range(k)],
+			random.getrandbits(bits) + 1)
+
+def crt_generator():
+	"""
+	A random base (sometimes a multiple of a factor) and exponent, and a
+	modulus made of random small prime powers, with its factorisation.
+	"""
+	primes = [2, 3, 5, 7, 11, 13, 31, 101, 257, 65537]
+	factorisation = {p: random.randint(1, 4)
+					 for p in random.sample(primes, random.randint(1, 4))}
+	m = 1
+	for p, e in factorisation.items():
+		m *= p ** e
+	a = random.getrandbits(random.randint(1, 64))
+	if random.randint(0, 2) == 0:
+		a *= random.choice(list(factorisation))
+	return (a, random.randint(0, 1000), m, factorisation)
+
+def naive_is_prime(n):
+	"""(int) -> bool"""
+	if n < 2:
+		return False
+	i = 2
+	while i * i <= n:
+		if n % i == 0:
+			return False
+		i += 1
+	return True
+
+def primality_generator():
+	"""
+	A batch of random candidates, small and up to a few million (past the
+	trial division), with some squares of primes and Carmichael numbers.
+	"""
+	candidates = [random.randint(0, random.choice([100, 10 ** 4, 10 ** 7]))
+				  for i in range(random.randint(0, 50))]
+	candidates += random.sample([561, 1105, 1729, 2465, 2821, 6601, 8911,
+								 1009 ** 2, 1013 * 1019, 2 ** 31 - 1], 3)
+	return (candidates,)
+
+def inverse_generator():
+	"""
+	Random values with a prime or composite modulus, invertible unless the
+	modulus is composite and unlucky.
+	"""
+	m = random.choice([random.randint(2, 10 ** 6), 65537, 2 ** 61 - 1,
+					   2 ** 127 - 1])
+	values = [random.randint(1, 10 ** 30) for i in range(random.randint(1, 50))]
+	return (values, m)
+
+def inverse_each(values, m):
+	"""([int], int) -> [int] or str"""
+	try:
+		return [pow(a, -1, m) for a in values]
+	except ValueError:
+		return "not invertible"
+
+def batch_inverse_or_error(values, m):
+	"""([int], int) -> [int] or str"""
+	try:
+		return batch_modular_inverse(values, m)
+	except ValueError:
+		return "not invertible"
+
+def batch_abm_generator():
+	"""
+	Arrays of random 32-bit bases, exponents and moduli, with the moduli
+	sometimes shared by every triple (broadcast).
+	"""
+	size = random.randint(1, 3000)
+	a, b, m = (np.random.randint(0, 2 ** 32, size=size, dtype=np.uint64)
+			   for i in range(3))
+	m[m == 0] = 1
+	if random.randint(0, 3) == 0:
+		m = m[0]
+	return (a, b, m)
+
+def pow_each(a, b, m):
+	"""(np.ndarray, np.ndarray, np.ndarray) -> np.ndarray"""
+	a, b, m = np.broadcast_arrays(a, b, m)
+	return np.array([pow(int(x), int(y), int(z))
+					 for x, y, z in zip(a, b, m)], dtype=np.uint64)
+
 if __name__ == '__main__':
 	mod_exp_tester = Tester(name="Modular Exponentiation Tester",
 							baseline=correct_modular_exp,
@@ -492,9 +1399,100 @@ if __name__ == '__main__':
 
 	fxns = [("Looping Modular Exponentiation", looping_modular_exp),
 			("Recursive Modular Exponentiation", recursive_modular_exp),
-			("Smarter Looping Modular Exponentiation", smarter_loop_modular_exp)]
+			("Smarter Looping Modular Exponentiation", smarter_loop_modular_exp),
+			("Modulus Context Exponentiation", modulus_context_exp),
+			("Sliding Window Modular Exponentiation", sliding_window_modular_exp)]
 
 	for fxn_tup in fxns:
 		mod_exp_tester.add_function(*fxn_tup)
 
-	mod_exp_tester.test_all_functions()
\ No newline at end of file
+	mod_exp_tester.test_all_functions()
+
+	# Every multiplication is followed by one mod, so this counts them
+	mod_exp_tester.count_operations(
+		sized_generator=lambda b: (random.randint(2, 10 ** 6),
+								   b,
+								   random.randint(2, 10 ** 6)),
+		sizes=geometric_sizes(2 ** 4, 2 ** 10))
+
+	big_mod_exp_tester = Tester(name="Big Modular Exponentiation Tester",
+								baseline=pow,
+								input_generator=big_abm_generator,
+								num_tests=200)
+	big_mod_exp_tester.add_function("Modulus Context Exponentiation",
+									modulus_context_exp)
+	big_mod_exp_tester.add_function("Modulus Context Exponentiation (pow "
+									"below the cut-off)",
+									context_modular_exp)
+	big_mod_exp_tester.add_function("Smarter Looping Modular Exponentiation",
+									smarter_loop_modular_exp)
+	big_mod_exp_tester.add_function("Sliding Window Modular Exponentiation",
+									sliding_window_modular_exp)
+	big_mod_exp_tester.add_function("Fixed-Base Comb Modular Exponentiation",
+									fixed_base_modular_exp)
+	big_mod_exp_tester.test_all_functions(shared_inputs=True)
+
+	benchmark_modular_exp(geometric_sizes(2 ** 4, 2 ** 12, factor=4))
+	benchmark_modular_exp(geometric_sizes(2 ** 13, 2 ** 17, factor=4),
+						  exponent_bits=32, repeats=1)
+
+	benchmark_precomputed_exp(geometric_sizes(2 ** 6, 2 ** 12, factor=4))
+
+	if np is not None:
+		batch_mod_exp_tester = Tester(name="Batch Modular Exponentiation Tester",
+									  baseline=pow_each,
+									  input_generator=batch_abm_generator,
+									  num_tests=50,
+									  equivalence_fxn=np.array_equal)
+		batch_mod_exp_tester.add_function("Batch Modular Exponentiation",
+										  batch_modular_exp)
+		batch_mod_exp_tester.add_function("Batch Modular Exponentiation (chunks "
+										  "of 100)",
+										  lambda a, b, m: batch_modular_exp(
+											  a, b, m, chunk_size=100))
+		batch_mod_exp_tester.test_all_functions(shared_inputs=True)
+		benchmark_batch_modular_exp(geometric_sizes(10 ** 3, 10 ** 5, factor=10))
+
+	multi_exp_tester = Tester(name="Multi-Exponentiation Tester",
+							  baseline=separate_multi_modular_exp,
+							  input_generator=multi_exp_generator,
+							  num_tests=200)
+	multi_exp_tester.add_function("Simultaneous Multi-Exponentiation",
+								  multi_modular_exp)
+	multi_exp_tester.test_all_functions(shared_inputs=True)
+	benchmark_multi_exp([2, 4, 8, 32])
+
+	crt_tester = Tester(name="CRT Exponentiation Tester",
+						baseline=lambda a, b, m, factorisation: (
+							correct_modular_exp(a, b, m)),
+						input_generator=crt_generator,
+						num_tests=200)
+	crt_tester.add_function("CRT Exponentiation", crt_modular_exp)
+	crt_tester.add_function("Sliding Window (no factorisation)",
+							lambda a, b, m, factorisation: (
+								crt_modular_exp(a, b, m)))
+	crt_tester.test_all_functions(shared_inputs=True)
+
+	# An RSA-like modulus, from two Mersenne primes
+	benchmark_crt_exp({2 ** 521 - 1: 1, 2 ** 607 - 1: 1},
+					  processes=multiprocessing.cpu_count())
+
+	primality_tester = Tester(name="Batch Primality Tester",
+							  baseline=lambda candidates: [
+								  naive_is_prime(n) for n in candidates],
+							  input_generator=primality_generator,
+							  num_tests=30)
+	primality_tester.add_function("Batch Miller-Rabin", batch_is_prime)
+	primality_tester.add_function("Batch Miller-Rabin (pool)",
+								  lambda candidates: batch_is_prime(
+									  candidates, processes=2))
+	primality_tester.test_all_functions(shared_inputs=True)
+
+	inverse_tester = Tester(name="Batch Inversion Tester",
+							baseline=inverse_each,
+							input_generator=inverse_generator,
+							num_tests=200)
+	inverse_tester.add_function("Batch Inversion", batch_inverse_or_error)
+	inverse_tester.test_all_functions(shared_inputs=True)
+
+	benchmark_batch_number_theory(500, processes=multiprocessing.cpu_count())
@@ -0,0 +1,29 @@
+class FenwickTree:
+    """
+    Binary indexed tree over the positions 1..size. Adding to one position
+    and summing a prefix of positions both take O(log size) time.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.tree = [0] * (size + 1)
+
+    def add(self, position, amount=1):
+        """(int, int) -> None
+        Adds amount to the value at position.
+        """
+        while position <= self.size:
+            self.tree[position] += amount
+            # Move to the next node whose range covers position
+            position += position & (-position)
+
+    def prefix_sum(self, position):
+        """(int) -> int
+        Sum of the values at positions 1..position.
+        """
+        total = 0
+        while position > 0:
+            total += self.tree[position]
+            # Drop the range this node covers
+            position -= position & (-position)
+        return total
@@ -1,3 +1,6 @@
+from Programming.Testing import OperationCounter
+
+
 class Point():
 
 	def __init__(self, x, y):
@@ -19,6 +22,7 @@ class Point():
 	def __ne__(self, other):
 		return not(self == other)
 
+	@OperationCounter.probe("distance calculations")
 	def distance(self, other):
 		x_diff = self.x - other.x
 		y_diff = self.y - other.y
@@ -0,0 +1,107 @@
+from bisect import bisect_left, bisect_right, insort
+
+from Programming.DataStructures.FenwickTree import FenwickTree
+
+
+class SortedMultiset:
+    """
+    Sorted collection of comparable values (duplicates allowed), kept as a
+    list of sorted buckets of about LOAD values each. A Fenwick tree over the
+    bucket sizes counts the values before any bucket, so adding, removing,
+    and counting the values below or above a value all take
+    O(log n + LOAD) time. Memory is O(n).
+    """
+
+    LOAD = 256
+
+    def __init__(self, values=()):
+        self._buckets = []
+        self._maxes = []
+        self._len = 0
+        for value in sorted(values):
+            if (not self._buckets) or (len(self._buckets[-1]) == self.LOAD):
+                self._buckets.append([])
+                self._maxes.append(value)
+            self._buckets[-1].append(value)
+            self._maxes[-1] = value
+            self._len += 1
+        self._rebuild_sizes()
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        for bucket in self._buckets:
+            yield from bucket
+
+    def _rebuild_sizes(self):
+        """(None) -> None
+        Rebuilds the Fenwick tree after buckets are split or removed.
+        """
+        self._sizes = FenwickTree(len(self._buckets))
+        for position, bucket in enumerate(self._buckets, 1):
+            self._sizes.add(position, len(bucket))
+
+    def add(self, value):
+        """(object) -> None"""
+        if not self._buckets:
+            self._buckets.append([value])
+            self._maxes.append(value)
+            self._len = 1
+            self._rebuild_sizes()
+            return
+
+        # First bucket whose max is >= value, or the last bucket
+        b = min(bisect_left(self._maxes, value), len(self._buckets) - 1)
+        bucket = self._buckets[b]
+        insort(bucket, value)
+        self._maxes[b] = bucket[-1]
+        self._sizes.add(b + 1)
+        self._len += 1
+
+        if len(bucket) > 2 * self.LOAD:
+            self._buckets[b:b + 1] = [bucket[:self.LOAD], bucket[self.LOAD:]]
+            self._maxes[b:b + 1] = [bucket[self.LOAD - 1], bucket[-1]]
+            self._rebuild_sizes()
+
+    def remove(self, value):
+        """(object) -> None
+        Removes one copy of value. Raises ValueError if value isn't stored.
+        """
+        b = bisect_left(self._maxes, value)
+        if b < len(self._buckets):
+            bucket = self._buckets[b]
+            i = bisect_left(bucket, value)
+            if bucket[i] == value:
+                del bucket[i]
+                self._len -= 1
+                if bucket:
+                    self._maxes[b] = bucket[-1]
+                    self._sizes.add(b + 1, -1)
+                else:
+                    del self._buckets[b]
+                    del self._maxes[b]
+                    self._rebuild_sizes()
+                return
+        raise ValueError("{value} is not stored".format(value=value))
+
+    def count_less(self, value):
+        """(object) -> int
+        Number of stored values strictly smaller than value.
+        """
+        # Every bucket before b only holds values < value
+        b = bisect_left(self._maxes, value)
+        if b == len(self._buckets):
+            return self._len
+        return self._sizes.prefix_sum(b) + bisect_left(self._buckets[b], value)
+
+    def count_greater(self, value):
+        """(object) -> int
+        Number of stored values strictly bigger than value.
+        """
+        # Every bucket before b only holds values <= value
+        b = bisect_right(self._maxes, value)
+        if b == len(self._buckets):
+            return 0
+        at_most = self._sizes.prefix_sum(b) + bisect_right(self._buckets[b], value)
+        return self._len - at_most
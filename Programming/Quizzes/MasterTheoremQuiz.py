@@ -51,6 +51,20 @@ class Recurrence():
 							  subprob_size=self.subproblem_size,
 							  branching_factor=self.branching_factor)
 
+	def growth_exponent(self):
+		"""(Recurrence) -> float
+
+		The exponent k such that the correct answer grows like n ^ k (the log
+		factor of the a = b^d case is left out).
+		"""
+		a = self.branching_factor
+		b_to_d = self.subproblem_size ** self.poly_degree
+
+		if a <= b_to_d:
+			return float(self.poly_degree)
+		else:
+			return math.log(a, self.subproblem_size)
+
 def generate_abd():
 
 	# Generate a random number in [0, 1, 2]
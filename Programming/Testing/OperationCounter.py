@@ -0,0 +1,88 @@
+import sys
+from contextlib import contextmanager
+
+"""
+Counting the "measure of interest" of an algorithm (number of
+multiplications, number of distance calculations, ...).
+
+Mark the function that does the operation with @probe(name). Probes are free
+while nothing is being counted: the decorator just returns the function.
+Inside a counting() block, every probed function is swapped (in its module
+or class) for a wrapper that counts its calls, and is put back afterwards.
+
+	with OperationCounter.counting() as counts:
+		brute_closest_pair(P)
+	counts -> {"distance calculations": 2450}
+"""
+
+# All registered probes, as (operation name, probed function)
+_probes = []
+
+# Whether a counting() block is currently running
+_counting = False
+
+
+def probe(name):
+	"""(String) -> (((Unknown) -> Unknown) -> ((Unknown) -> Unknown))
+
+	Decorator that marks a module-level function or a method as one
+	operation of the given name.
+	"""
+	def decorator(fxn):
+		if "<locals>" in fxn.__qualname__:
+			raise ValueError("Can only probe module-level functions and "
+							 "methods, not {fxn}".format(fxn=fxn.__qualname__))
+		_probes.append((name, fxn))
+		return fxn
+	return decorator
+
+
+def _owner_of(fxn):
+	"""(((Unknown) -> Unknown)) -> (Object, String)
+	The module or class that fxn is defined in, and its name in there.
+	"""
+	owner = sys.modules[fxn.__module__]
+	path = fxn.__qualname__.split(".")
+	for attr in path[:-1]:
+		owner = getattr(owner, attr)
+	return (owner, path[-1])
+
+
+def _counted(name, fxn, counts):
+	def wrapper(*args, **kwargs):
+		counts[name] += 1
+		return fxn(*args, **kwargs)
+	wrapper.__name__ = fxn.__name__
+	wrapper.__qualname__ = fxn.__qualname__
+	wrapper.__doc__ = fxn.__doc__
+	return wrapper
+
+
+@contextmanager
+def counting():
+	"""(None) -> {String: int}
+
+	Context manager that counts calls to every probed function while it is
+	running. Yields the (live) dict of counts, keyed by operation name.
+	"""
+	global _counting
+	if _counting:
+		raise RuntimeError("counting() blocks can't be nested")
+
+	counts = {}
+	swapped = []
+	for name, fxn in _probes:
+		counts[name] = 0
+		owner, attr = _owner_of(fxn)
+		# Skip functions that have been rebound since they were probed
+		if vars(owner).get(attr) is fxn:
+			setattr(owner, attr, _counted(name, fxn, counts))
+			swapped += [(owner, attr, fxn)]
+
+	_counting = True
+	try:
+		yield counts
+	finally:
+		for owner, attr, fxn in swapped:
+			setattr(owner, attr, fxn)
+		_counting = False
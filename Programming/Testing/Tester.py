@@ -1,31 +1,234 @@
+import hashlib
+import inspect
+import math
+import multiprocessing
+import os
+import pickle
 import random
+import sys
+import tempfile
+import time
+
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+from Programming.Testing import OperationCounter
+
+# Tester and stop flags used by the worker processes of a parallel battery.
+# These are handed over through the pool initializer, so when the platform can
+# fork they are inherited rather than pickled (most of my baselines, input
+# generators and equivalence functions are lambdas).
+_worker_tester = None
+_worker_stop_flags = None
+
+
+def _pool_context():
+	"""(None) -> multiprocessing context
+	Use fork whenever the platform has it, otherwise fall back to the default
+	start method (which needs a picklable Tester).
+	"""
+	if "fork" in multiprocessing.get_all_start_methods():
+		return multiprocessing.get_context("fork")
+	return multiprocessing.get_context()
+
+
+def _init_worker(tester, stop_flags):
+	global _worker_tester, _worker_stop_flags
+	_worker_tester = tester
+	_worker_stop_flags = stop_flags
+
+
+def _run_chunk(task):
+	"""(([String], [int], int, int, int, int)) ->
+	{String: (int, (Unknown, Unknown, Unknown, bool))}
+
+	Run test cases [start, stop) of the given functions' batteries in a
+	worker process. Returns the first failing case of the chunk for every
+	function that failed in it.
+	"""
+	fxn_names, fxn_indices, chunk_num, start, stop, seed = task
+
+	# Every chunk gets its own seed, so a chunk sees the same inputs no matter
+	# which worker picks it up or how many workers there are
+	_seed_generators(seed * (2 ** 32) + chunk_num)
+
+	return _worker_tester._run_cases(fxn_names, fxn_indices, start, stop,
+									 _worker_stop_flags)
+
+
+def _seed_generators(seed):
+	"""(int) -> None
+	Seeds random, and NumPy's global generator (which only takes 32-bit seeds,
+	so it gets a hash of seed) when NumPy is installed.
+	"""
+	random.seed(seed)
+	if np is not None:
+		digest = hashlib.sha256(str(seed).encode()).digest()
+		np.random.seed(int.from_bytes(digest[:4], "little"))
+
+
+def _code_fingerprint(code):
+	"""(code) -> String
+	Hash of a code object's bytecode, names and constants (nested functions'
+	code objects included, by their own fingerprints).
+	"""
+	digest = hashlib.sha256(code.co_code)
+	digest.update(repr(code.co_names).encode())
+	for const in code.co_consts:
+		if hasattr(const, "co_code"):
+			digest.update(_code_fingerprint(const).encode())
+		else:
+			digest.update(repr(const).encode())
+	return digest.hexdigest()
+
+
+# Module name -> hash of its source, computed once per process
+_module_fingerprints = {}
+
+
+def _module_fingerprint(module_name):
+	"""(String) -> String
+	Hash of the source of the module (None if it has no source, like builtin
+	modules), so that editing anything in it changes the hash.
+	"""
+	if module_name not in _module_fingerprints:
+		try:
+			source = inspect.getsource(sys.modules[module_name])
+			fingerprint = hashlib.sha256(source.encode()).hexdigest()
+		except (KeyError, TypeError, OSError):
+			fingerprint = None
+		_module_fingerprints[module_name] = fingerprint
+	return _module_fingerprints[module_name]
+
+
+def _lower_stop_flag(stop_flags, i, case_num):
+	"""([int], int, int) -> None
+	stop_flags[i] = min(stop_flags[i], case_num), under the array's lock if
+	it is shared between processes.
+	"""
+	if hasattr(stop_flags, "get_lock"):
+		with stop_flags.get_lock():
+			stop_flags[i] = min(stop_flags[i], case_num)
+	else:
+		stop_flags[i] = min(stop_flags[i], case_num)
+
+
+def geometric_sizes(min_size, max_size, factor=2):
+	"""(int, int, Num) -> [int]
+	Input sizes min_size, min_size * factor, min_size * factor ** 2, ... up to
+	max_size (inclusive).
+	"""
+	sizes = []
+	size = min_size
+	while size <= max_size:
+		if (sizes == []) or (int(size) != sizes[-1]):
+			sizes += [int(size)]
+		size *= factor
+	return sizes
+
+
+def fit_growth_exponent(sizes, times):
+	"""([int], [float]) -> float
+
+	Least-squares slope of log(time) against log(size). If time grows like
+	n ^ k, the slope is k (a log factor shows up as a little extra on top).
+	Needs at least two different sizes.
+	"""
+	if len(set(sizes)) < 2:
+		raise ValueError("Need at least two different sizes to fit a growth "
+						 "exponent, got {sizes}".format(sizes=sizes))
+	xs = [math.log(size) for size in sizes]
+	ys = [math.log(t) for t in times]
+	mean_x = sum(xs) / len(xs)
+	mean_y = sum(ys) / len(ys)
+	covariance = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+	variance = sum((x - mean_x) ** 2 for x in xs)
+	return covariance / variance
+
 
 """Class to automatically test my code for this course."""
 class Tester():
 	def __init__(self, name, baseline, input_generator, num_tests,
-				 equivalence_fxn=(lambda x, y: x == y)):
+				 equivalence_fxn=(lambda x, y: x == y), chunk_size=100,
+				 cache_dir=None):
 		"""(String,
 		((Unknown) -> Unknown),
 		((None) -> (Unknown)),
 		int,
-		((Unknown, Unknown) -> bool)) ->
-		Tester"""
+		((Unknown, Unknown) -> bool),
+		int,
+		String) ->
+		Tester
+
+		If cache_dir is given, baseline outputs are stored there (keyed by a
+		hash of the tester's name, the baseline's name and bytecode, the
+		source of the baseline's module, and the input) and reused on later
+		runs, until the baseline or anything in its module changes. Helpers
+		the baseline imports from OTHER modules aren't part of the key: clear
+		cache_dir by hand after changing those.
+		"""
 		self.name = name
 		self.baseline = baseline
 		self.input_generator = input_generator
 		self.num_tests = num_tests
 		self.equivalence_fxn = equivalence_fxn
+		self.chunk_size = chunk_size
+		self.cache_dir = cache_dir
 		self.functions = {}
 
 	def add_function(self, fxn_name, fxn):
 		"""(String, ((Unknown) -> Unknown)) -> None"""
 		self.functions[fxn_name] = fxn
 
+	def expected_output(self, inp):
+		"""((Unknown)) -> Unknown
+
+		The baseline's output on inp, read from the cache when possible.
+		"""
+		if self.cache_dir is None:
+			return self.baseline(*inp)
+
+		key = hashlib.sha256(pickle.dumps((self.name, self._baseline_identity(),
+										   inp))).hexdigest()
+		path = os.path.join(self.cache_dir, key[:2], key + ".pickle")
+		if os.path.exists(path):
+			with open(path, "rb") as cached:
+				return pickle.load(cached)
+
+		expected = self.baseline(*inp)
+
+		# Write to a temporary file first so that other workers never read a
+		# half-written entry
+		os.makedirs(os.path.dirname(path), exist_ok=True)
+		handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+		with os.fdopen(handle, "wb") as temp:
+			pickle.dump(expected, temp)
+		os.replace(temp_path, path)
+		return expected
+
+	def _baseline_identity(self):
+		"""(None) -> (String, String, String, String)
+
+		What identifies the baseline's code (name, bytecode, constants and
+		names it uses, and the source of its whole module so that the helpers
+		it calls there count too), so that cached outputs of an old baseline
+		are never used. Builtins have no bytecode or source; their name is
+		enough.
+		"""
+		code = getattr(self.baseline, "__code__", None)
+		module = getattr(self.baseline, "__module__", None)
+		return (module,
+				getattr(self.baseline, "__qualname__", repr(self.baseline)),
+				_code_fingerprint(code) if code else None,
+				_module_fingerprint(module) if module else None)
+
 	def test_function(self, function_name):
 		"""(String) -> (Unknown, Unknown, Unknown, bool)"""
 
 		inp = self.input_generator()
-		expected = self.baseline(*inp)
+		expected = self.expected_output(inp)
 		result = self.functions[function_name](*inp)
 
 		return (inp,
@@ -33,28 +236,248 @@ class Tester():
 				result,
 				self.equivalence_fxn(expected, result))
 
-	def test_battery(self, function_name):
+	def test_battery(self, function_name, processes=None, seed=None):
+		"""(String, int, int) -> bool
+
+		Runs num_tests tests on the function. If processes is given, the
+		tests are spread in chunks of chunk_size over that many worker
+		processes, with chunk i seeded from (seed, i) (seed defaults to 0).
+		Otherwise random and np.random are seeded with seed if it is given.
+		"""
+		if processes is not None:
+			return self._parallel_batteries([function_name],
+											processes,
+											0 if seed is None else seed,
+											False)[function_name]
+
+		if seed is not None:
+			_seed_generators(seed)
+
 		print("Testing {fxn_name}".format(fxn_name=function_name))
 		for i in range(self.num_tests):
 			test_result = self.test_function(function_name)
 			passed = test_result[-1]
 			if not passed:
-				print("Test failed.\n\tInput: {inp}\n\tExpected: {"
-					  "exp}\n\tOutput: {out}".format(inp=test_result[0],
-													exp=test_result[1],
-													out=test_result[2]))
+				self._report_failure(test_result)
 				return False
 		return True
 
-	def test_all_functions(self):
+	def test_all_functions(self, processes=None, seed=None,
+						   shared_inputs=False):
+		"""(int, int, bool) -> None
+
+		Runs a battery on every registered function. If processes is given,
+		all the batteries share one pool of that many worker processes (seeded
+		as in test_battery). Otherwise random and np.random are seeded once
+		with seed, if it is given, before the first battery.
+
+		If shared_inputs is True, every generated input (and the baseline's
+		output on it) is used to check all the functions that haven't failed
+		yet, instead of every function getting inputs of its own.
+		"""
 		passes = []
 		failures = []
-		for fxn_name in self.functions.keys():
-			if self.test_battery(fxn_name):
+		fxn_names = list(self.functions.keys())
+		if processes is not None:
+			results = self._parallel_batteries(fxn_names, processes,
+											   0 if seed is None else seed,
+											   shared_inputs)
+		else:
+			if seed is not None:
+				_seed_generators(seed)
+			if shared_inputs:
+				first_failures = self._run_cases(fxn_names,
+												 range(len(fxn_names)),
+												 0,
+												 self.num_tests,
+												 [self.num_tests] *
+												 len(fxn_names))
+				results = self._report_batteries(fxn_names, first_failures)
+			else:
+				results = {}
+				for fxn_name in fxn_names:
+					results[fxn_name] = self.test_battery(fxn_name)
+
+		for fxn_name in results:
+			if results[fxn_name]:
 				passes += [fxn_name]
 			else:
 				failures += [fxn_name]
 		print("{name} Test Results:\n\tPassing Functions: {passes}\n\tFailing "
 			  "Functions: {fails}".format(name=self.name,
 										 passes=", ".join(passes),
-										 fails=", ".join(failures)))
\ No newline at end of file
+										 fails=", ".join(failures)))
+
+	def benchmark(self, sized_generator, sizes, recurrences=None, repeats=3,
+				  tolerance=0.2):
+		"""(((int) -> (Unknown)), [int], {String: Recurrence}, int, float) ->
+		{String: float}
+
+		Times every registered function on inputs of each size (best of
+		repeats runs, with all the functions sharing the same inputs), then
+		fits the exponent k in time ~ n ^ k. If a function has a Recurrence,
+		its measured exponent is reported next to the Master Theorem's, and
+		it is flagged when it grows more than tolerance faster than that.
+		"""
+		if recurrences is None:
+			recurrences = {}
+
+		timings = {}
+		for fxn_name in self.functions:
+			timings[fxn_name] = [float("inf")] * len(sizes)
+
+		for size_num, size in enumerate(sizes):
+			for i in range(repeats):
+				inp = sized_generator(size)
+				for fxn_name, fxn in self.functions.items():
+					start = time.perf_counter()
+					fxn(*inp)
+					elapsed = time.perf_counter() - start
+					timings[fxn_name][size_num] = min(
+						timings[fxn_name][size_num], elapsed)
+
+		print("{name} Benchmark Results:".format(name=self.name))
+		exponents = {}
+		for fxn_name in self.functions:
+			# Guard against timers too coarse to see the smallest inputs
+			times = [max(t, 1e-9) for t in timings[fxn_name]]
+			exponents[fxn_name] = fit_growth_exponent(sizes, times)
+
+			report = "\t{fxn_name}: measured n ^ {exp:.2f}".format(
+				fxn_name=fxn_name,
+				exp=exponents[fxn_name])
+			if fxn_name in recurrences:
+				rec = recurrences[fxn_name]
+				predicted = rec.growth_exponent()
+				report += ", predicted {ans} ~ n ^ {pred:.2f}".format(
+					ans=rec.correct_answer(),
+					pred=predicted)
+				if exponents[fxn_name] > predicted + tolerance:
+					report += " (GROWING TOO FAST)"
+			print(report)
+			for size, t in zip(sizes, timings[fxn_name]):
+				print("\t\tn = {size}: {t:.6f}s".format(size=size, t=t))
+		return exponents
+
+	def count_operations(self, sized_generator, sizes, repeats=3):
+		"""(((int) -> (Unknown)), [int], int) -> {String: {int: {String: float}}}
+
+		Counts the probed operations (see OperationCounter) that every
+		registered function does on inputs of each size, averaged over repeats
+		calls. Returns {function name: {size: {operation: count per call}}}.
+		"""
+		all_counts = {}
+		for fxn_name in self.functions:
+			all_counts[fxn_name] = {}
+
+		for size in sizes:
+			inputs = [sized_generator(size) for i in range(repeats)]
+			for fxn_name, fxn in self.functions.items():
+				with OperationCounter.counting() as counts:
+					for inp in inputs:
+						fxn(*inp)
+				per_call = {}
+				for operation, count in counts.items():
+					if count > 0:
+						per_call[operation] = count / repeats
+				all_counts[fxn_name][size] = per_call
+
+		print("{name} Operation Counts:".format(name=self.name))
+		for fxn_name in self.functions:
+			print("\t{fxn_name}:".format(fxn_name=fxn_name))
+			for size in sizes:
+				per_call = all_counts[fxn_name][size]
+				counts_str = ", ".join("{op} = {count:.1f}".format(op=op,
+																	count=count)
+									   for op, count in sorted(per_call.items()))
+				print("\t\tn = {size}: {counts}".format(size=size,
+														counts=counts_str))
+		return all_counts
+
+	def _run_cases(self, fxn_names, fxn_indices, start, stop, stop_flags):
+		"""([String], [int], int, int, [int]) ->
+		{String: (int, (Unknown, Unknown, Unknown, bool))}
+
+		Runs cases [start, stop) on the functions fxn_names[i] for i in
+		fxn_indices, generating one input (and one expected output) per case
+		for all of them. stop_flags[i] is the earliest case known to fail for
+		function i (num_tests if none): cases after it are skipped, but
+		earlier ones still run, so the earliest failure is always found.
+		"""
+		first_failures = {}
+		for case_num in range(start, stop):
+			remaining = [i for i in fxn_indices if case_num < stop_flags[i]]
+			if remaining == []:
+				break
+
+			inp = self.input_generator()
+			expected = self.expected_output(inp)
+			for i in remaining:
+				result = self.functions[fxn_names[i]](*inp)
+				if not self.equivalence_fxn(expected, result):
+					_lower_stop_flag(stop_flags, i, case_num)
+					first_failures[fxn_names[i]] = (case_num,
+													(inp, expected, result,
+													 False))
+		return first_failures
+
+	def _parallel_batteries(self, fxn_names, processes, seed, shared_inputs):
+		"""([String], int, int, bool) -> {String: bool}
+
+		Runs the batteries of all the given functions over one process pool.
+		As soon as a worker finds a failing case for a function, the workers
+		skip that function's later cases (but not its earlier ones, so the
+		failure reported is the earliest one whatever the scheduling).
+		"""
+		context = _pool_context()
+		stop_flags = context.Array("q", [self.num_tests] * len(fxn_names))
+
+		if shared_inputs:
+			index_groups = [list(range(len(fxn_names)))]
+		else:
+			index_groups = [[i] for i in range(len(fxn_names))]
+
+		tasks = []
+		for fxn_indices in index_groups:
+			starts = range(0, self.num_tests, self.chunk_size)
+			for chunk_num, start in enumerate(starts):
+				stop = min(start + self.chunk_size, self.num_tests)
+				tasks += [(fxn_names, fxn_indices, chunk_num, start, stop,
+						   seed)]
+
+		# Keep the earliest failing case found for every function
+		first_failures = {}
+		with context.Pool(processes,
+						  initializer=_init_worker,
+						  initargs=(self, stop_flags)) as pool:
+			for chunk_failures in pool.imap_unordered(_run_chunk, tasks):
+				for fxn_name, failure in chunk_failures.items():
+					if ((fxn_name not in first_failures) or
+							(failure[0] < first_failures[fxn_name][0])):
+						first_failures[fxn_name] = failure
+
+		return self._report_batteries(fxn_names, first_failures)
+
+	def _report_batteries(self, fxn_names, first_failures):
+		"""([String], {String: (int, (Unknown, Unknown, Unknown, bool))}) ->
+		{String: bool}
+
+		Prints the batteries' reports in the same order and format as the
+		serial batteries, and returns whether each function passed.
+		"""
+		results = {}
+		for fxn_name in fxn_names:
+			print("Testing {fxn_name}".format(fxn_name=fxn_name))
+			if fxn_name in first_failures:
+				self._report_failure(first_failures[fxn_name][1])
+				results[fxn_name] = False
+			else:
+				results[fxn_name] = True
+		return results
+
+	def _report_failure(self, test_result):
+		"""((Unknown, Unknown, Unknown, bool)) -> None"""
+		print("Test failed.\n\tInput: {inp}\n\tExpected: {"
+			  "exp}\n\tOutput: {out}".format(inp=test_result[0],
+											exp=test_result[1],
+											out=test_result[2]))